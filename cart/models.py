@@ -59,6 +59,13 @@ class Order(models.Model):
             f"Total: {self.total_price} ₴ - Status: {self.get_status_display()}"
         )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"], name="order_user_created_idx"
+            ),
+        ]
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(
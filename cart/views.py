@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 
 from goods.models import Good
+from goods.pagination import OrderCursorPagination
 from .models import Cart, CartItem, Order
 from .serializers import CartSerializer, OrderSerializer
 
@@ -116,3 +117,4 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
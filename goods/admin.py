@@ -1,5 +1,10 @@
 # admin.py
-from django.contrib import admin
+from decimal import Decimal
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from goods.bulk import reprice_goods
 from goods.models import (
     Good,
     Category,
@@ -15,7 +20,8 @@ from goods.models import (
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
     extra = 1
-    fields = ["image", "description"]
+    fields = ["image", "description", "image_status"]
+    readonly_fields = ["image_status"]
 
 
 
@@ -37,9 +43,9 @@ class AttributeGroupAdmin(admin.ModelAdmin):
 
 @admin.register(Attribute)
 class AttributeAdmin(admin.ModelAdmin):
-    list_display = ["name", "group", "order"]
+    list_display = ["name", "group", "order", "is_numeric", "unit"]
     list_editable = ["group", "order"]
-    list_filter = ["group", "categories"]
+    list_filter = ["group", "categories", "is_numeric"]
     search_fields = ["name", "group__name"]
     prepopulated_fields = {"slug": ("name",)}
     ordering = ["group__order", "order", "name"]
@@ -66,6 +72,17 @@ class AttributeValueInline(admin.TabularInline):
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
+class RepriceActionForm(ActionForm):
+    sale_percent = forms.IntegerField(min_value=0, max_value=100, required=False)
+    price_percent = forms.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=Decimal("-99"),
+        required=False,
+        help_text="Change prices by this percentage, e.g. -10 or 5.",
+    )
+
+
 @admin.register(Good)
 class GoodAdmin(admin.ModelAdmin):
     search_fields = [
@@ -75,10 +92,30 @@ class GoodAdmin(admin.ModelAdmin):
         "category__name",
     ]
     list_display = ["id", "name", "slug", "category", "brand", "price", "sale_percent"]
-    readonly_fields = ["final_price"]
+    readonly_fields = ["final_price", "image_status"]
     inlines = [AttributeValueInline, ProductImageInline]
     list_filter = ["category"]
     autocomplete_fields = ["category", "brand"]
+    action_form = RepriceActionForm
+    actions = ["reprice"]
+
+    @admin.action(description="Reprice selected goods", permissions=["change"])
+    def reprice(self, request, queryset):
+        form = self.action_form(request.POST)
+        if not form.is_valid():
+            self.message_user(request, form.errors.as_text(), messages.ERROR)
+            return
+        sale_percent = form.cleaned_data["sale_percent"]
+        price_percent = form.cleaned_data["price_percent"]
+        if sale_percent is None and price_percent is None:
+            self.message_user(
+                request, "Set a sale percent, a price percent or both.", messages.ERROR
+            )
+            return
+        updated = reprice_goods(
+            queryset, sale_percent=sale_percent, price_percent=price_percent
+        )
+        self.message_user(request, f"Repriced {updated} goods.", messages.SUCCESS)
 
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GoodsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "goods"
+
+    def ready(self):
+        import goods.checks  # noqa: F401
+        import goods.signals  # noqa: F401
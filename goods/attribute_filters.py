@@ -0,0 +1,95 @@
+import copy
+
+from django_filters import rest_framework as filters
+
+from goods.models import Attribute
+from goods.versions import VersionedIndex
+
+
+class AttributeInFilter(filters.BaseInFilter):
+    """
+    Comma separated filter on the values of a single attribute.
+
+    The filtering itself is delegated to ``parent.filter_by_attribute`` so the
+    FilterSet keeps control over how attribute lookups are built.
+    """
+
+    def __init__(self, *args, attribute_name=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attribute_name = attribute_name
+
+    def filter(self, qs, value):
+        return self.parent.filter_by_attribute(
+            qs, self.field_name, value, self.attribute_name
+        )
+
+
+class AttributeRangeFilter(filters.NumberFilter):
+    """
+    Bound on the numeric value of a single attribute, in the attribute's unit.
+
+    Delegates to ``parent.filter_by_attribute_range`` like AttributeInFilter.
+    """
+
+    def __init__(self, *args, attribute_name=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attribute_name = attribute_name
+
+    def filter(self, qs, value):
+        return self.parent.filter_by_attribute_range(
+            qs, self.field_name, value, self.attribute_name, self.lookup_expr
+        )
+
+
+class AttributeFilterRegistry(VersionedIndex):
+    """
+    Process-wide set of attribute filters, rebuilt only when attributes change.
+
+    The registry remembers the version it was built from; a change in any
+    worker bumps the shared version and every process rebuilds lazily.
+    """
+
+    version_name = "attribute_filters"
+
+    def __init__(self):
+        super().__init__()
+        self._filters = {}
+
+    @staticmethod
+    def filter_name(attribute_name):
+        return attribute_name.lower().replace(" ", "_")
+
+    def build(self):
+        registry = {}
+        attributes = Attribute.objects.order_by().values_list("name", "is_numeric")
+        for attribute_name, is_numeric in attributes:
+            filter_name = self.filter_name(attribute_name)
+            registry[filter_name] = AttributeInFilter(
+                field_name=filter_name, attribute_name=attribute_name
+            )
+            if is_numeric:
+                for suffix, lookup_expr in (("min", "gte"), ("max", "lte")):
+                    registry[f"{filter_name}__{suffix}"] = AttributeRangeFilter(
+                        field_name=filter_name,
+                        attribute_name=attribute_name,
+                        lookup_expr=lookup_expr,
+                    )
+        self._filters = registry
+
+    def get_filters(self):
+        self.ensure_current()
+        return self._filters
+
+    def clone_filters(self, parent):
+        """
+        Return shallow copies of the registered filters bound to ``parent``.
+        """
+        clones = {}
+        for name, registered_filter in self.get_filters().items():
+            clone = copy.copy(registered_filter)
+            clone.parent = parent
+            clones[name] = clone
+        return clones
+
+
+attribute_filter_registry = AttributeFilterRegistry()
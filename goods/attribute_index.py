@@ -0,0 +1,151 @@
+import heapq
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from goods.models import Attribute, AttributeValue
+from goods.versions import VersionedIndex
+
+# Above this many matches an IN list stops paying off against the
+# (attribute, value) index, so the filter falls back to SQL.
+MAX_INDEXED_MATCHES = 2000
+
+
+def normalize_value(value):
+    # Matching stays exact like the SQL filter, which only strips stray
+    # whitespace from the requested values, never from stored ones.
+    return value.strip()
+
+
+def merge_unique(postings):
+    """
+    Sorted union of sorted id arrays.
+    """
+    if len(postings) == 1:
+        return postings[0]
+    merged = array("q")
+    previous = None
+    for good_id in heapq.merge(*postings):
+        if good_id != previous:
+            merged.append(good_id)
+            previous = good_id
+    return merged
+
+
+def intersect_sorted(postings):
+    """
+    Sorted intersection of sorted id arrays.
+
+    Candidates come from the shortest array and are probed in the others with
+    a moving bisect, so the cost follows the most selective filter rather than
+    the number of filters.
+    """
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        matched = array("q")
+        low = 0
+        for good_id in result:
+            low = bisect_left(other, good_id, low)
+            if low == len(other):
+                break
+            if other[low] == good_id:
+                matched.append(good_id)
+        result = matched
+        if not result:
+            break
+    return result
+
+
+class AttributeIndex(VersionedIndex):
+    """
+    Inverted index from (attribute, stored value) to sorted good ids.
+
+    Attribute filters are answered by intersecting id arrays in memory; the
+    database then only fetches the ordered page by primary key.
+    """
+
+    version_name = "attribute_index"
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self.postings = defaultdict(lambda: array("q"))
+        self.goods = defaultdict(dict)
+        self.attribute_ids = defaultdict(set)
+
+    def build(self):
+        self._reset()
+        for attribute_id, name in Attribute.objects.values_list("id", "name"):
+            self.attribute_ids[name].add(attribute_id)
+        rows = (
+            AttributeValue.objects.order_by("good_id")
+            .values_list("good_id", "attribute_id", "value")
+            .iterator()
+        )
+        # Rows arrive by good id, so appending keeps every array sorted.
+        for good_id, attribute_id, value in rows:
+            self.postings[(attribute_id, value)].append(good_id)
+            self.goods[good_id][attribute_id] = value
+
+    def _discard(self, good_id, attribute_id):
+        value = self.goods[good_id].pop(attribute_id, None)
+        if value is None:
+            return
+        posting = self.postings[(attribute_id, value)]
+        index = bisect_left(posting, good_id)
+        if index < len(posting) and posting[index] == good_id:
+            del posting[index]
+
+    # Incremental updates, called from signal handlers after commit and
+    # replayed by every process from the change log.
+
+    def _set_value(self, good_id, attribute_id, value):
+        self._discard(good_id, attribute_id)
+        if value is not None:
+            insort(self.postings[(attribute_id, value)], good_id)
+            self.goods[good_id][attribute_id] = value
+
+    def _remove_good(self, good_id):
+        for attribute_id in list(self.goods.get(good_id, ())):
+            self._discard(good_id, attribute_id)
+        self.goods.pop(good_id, None)
+
+    def set_value(self, good_id, attribute_id, value):
+        self.apply_change("_set_value", good_id, attribute_id, value)
+
+    def remove_good(self, good_id):
+        self.apply_change("_remove_good", good_id)
+
+    # Queries.
+
+    def matching_ids(self, selections):
+        """
+        Return the sorted ids of goods matching every ``{attribute name:
+        values}`` selection, or None when the match is too broad to be worth
+        an IN list.
+        """
+        self.ensure_current()
+        with self._lock:
+            per_attribute = []
+            for attribute_name, values in selections.items():
+                keys = [
+                    (attribute_id, normalize_value(value))
+                    for attribute_id in self.attribute_ids.get(attribute_name, ())
+                    for value in values
+                ]
+                postings = [self.postings[key] for key in keys if key in self.postings]
+                if not postings:
+                    return []
+                per_attribute.append(merge_unique(postings))
+            if not per_attribute:
+                return None
+            matched = intersect_sorted(per_attribute)
+            if len(matched) > MAX_INDEXED_MATCHES:
+                return None
+            return matched.tolist()
+
+
+attribute_index = AttributeIndex()
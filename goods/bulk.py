@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Now, Round
+
+from goods.attribute_index import attribute_index
+from goods.conditional import GOODS_VERSION
+from goods.documents import document_queue
+from goods.facets import facet_index
+from goods.models import PERCENT
+from goods.navigation import invalidate_navigation
+from goods.response_cache import (
+    GOODS_DETAIL_TAG,
+    GOODS_LIST_TAG,
+    category_tag,
+    good_tag,
+    invalidate_tags,
+)
+from goods.suggest import suggest_index
+from goods.versions import bump_version
+
+
+def goods_changed_in_bulk(slugs=(), category_ids=()):
+    """
+    Refresh derived catalog state after writes that bypass Good.save().
+
+    QuerySet.update() and bulk_create() send no model signals, so the
+    in-process indexes, the navigation tree, version counters and cached
+    responses have to be told explicitly. ``slugs=None`` stands for "any
+    good" and evicts every cached detail page.
+    """
+    attribute_index.invalidate()
+    facet_index.invalidate()
+    suggest_index.invalidate()
+    invalidate_navigation()
+    bump_version(GOODS_VERSION)
+    if slugs is None:
+        detail_tags = [GOODS_DETAIL_TAG]
+    else:
+        detail_tags = [good_tag(slug) for slug in slugs]
+    invalidate_tags(
+        GOODS_LIST_TAG,
+        *(category_tag(category_id) for category_id in category_ids),
+        *detail_tags,
+    )
+    if slugs is not None:
+        document_queue.add(condition=Q(slug__in=list(slugs)))
+    elif category_ids:
+        document_queue.add(condition=Q(category_id__in=list(category_ids)))
+    else:
+        document_queue.add(condition=Q())
+
+
+def reprice_goods(queryset, sale_percent=None, price_percent=None):
+    """
+    Set ``sale_percent`` and/or scale ``price`` by ``price_percent`` on every
+    good in ``queryset`` with a single UPDATE; the database regenerates
+    ``final_price``. Return the number of updated goods.
+    """
+    changes = {"updated_at": Now()}
+    if price_percent is not None:
+        changes["price"] = Round(F("price") * (100 + price_percent) * PERCENT, 2)
+    if sale_percent is not None:
+        changes["sale_percent"] = sale_percent
+
+    with transaction.atomic():
+        category_ids = set(
+            queryset.order_by().values_list("category_id", flat=True).distinct()
+        )
+        updated = queryset.update(**changes)
+        transaction.on_commit(
+            lambda: goods_changed_in_bulk(slugs=None, category_ids=category_ids)
+        )
+    return updated
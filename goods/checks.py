@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Index versions, the change log and cached responses are shared through
+    the caches; a process-local backend keeps other workers and the
+    process_images command from ever seeing each other's updates.
+    """
+    aliases = ["default", getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+    return [
+        Warning(
+            f"The {alias!r} cache is local to each process.",
+            hint="Use a shared backend (the database, Memcached or Redis) when "
+            "running more than one process, including the process_images worker.",
+            obj=alias,
+            id="goods.W001",
+        )
+        for alias in dict.fromkeys(aliases)
+        if settings.CACHES.get(alias, {}).get("BACKEND") in PROCESS_LOCAL_CACHES
+    ]
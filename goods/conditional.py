@@ -0,0 +1,90 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from goods.versions import get_version, get_last_modified
+
+CATALOG_VERSION = "catalog"
+GOODS_VERSION = "goods"
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for read-only catalog actions.
+
+    Validators are derived from version counters (and a per-object timestamp
+    on detail routes that track one), so a matching ``If-None-Match`` or
+    ``If-Modified-Since`` is answered with 304 before the queryset or the
+    serializers run.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    conditional_version_names = (CATALOG_VERSION, GOODS_VERSION)
+
+    def get_conditional_object_timestamp(self):
+        """
+        Return when the requested object last changed, or None if not tracked.
+        """
+        return None
+
+    def get_conditional_state(self, request):
+        version_names = self.conditional_version_names
+        object_timestamp = None
+        if self.action == "retrieve":
+            object_timestamp = self.get_conditional_object_timestamp()
+            if object_timestamp is not None:
+                # The object's own timestamp covers goods-level changes.
+                version_names = (CATALOG_VERSION,)
+                object_timestamp = object_timestamp.timestamp()
+
+        versions = [get_version(name) for name in version_names]
+        last_modified = max(
+            filter(None, (get_last_modified(*version_names), object_timestamp)),
+            default=None,
+        )
+        fingerprint = "|".join(
+            str(part)
+            for part in (
+                request.get_full_path(),
+                request.META.get("HTTP_ACCEPT", ""),
+                *versions,
+                object_timestamp,
+            )
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        return etag, int(last_modified) if last_modified else None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_state = None
+        if request.method in ("GET", "HEAD") and self.action in self.conditional_actions:
+            etag, last_modified = self._conditional_state = self.get_conditional_state(
+                request
+            )
+            response = get_conditional_response(
+                request._request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        state = getattr(self, "_conditional_state", None)
+        if state and response.status_code in (200, 304):
+            etag, last_modified = state
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
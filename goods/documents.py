@@ -0,0 +1,159 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+
+from goods.models import Good, GoodDocument
+from goods.renderers import FastJSONRenderer
+from goods.serializers import GoodListSerializer, GoodSerializer
+
+logger = logging.getLogger(__name__)
+
+# Documents are shared by every host the API is reached on, so media URLs are
+# rendered against this placeholder and the request origin is spliced in when
+# the bytes are served.
+ORIGIN_PLACEHOLDER = "__document_origin__"
+
+
+class DocumentRequest:
+    """
+    The part of a request serializers need to build absolute media URLs.
+    """
+
+    def build_absolute_uri(self, location=None):
+        if "://" in (location or ""):
+            return location
+        return f"{ORIGIN_PLACEHOLDER}{location or '/'}"
+
+
+def render_json(data):
+    return FastJSONRenderer().render(data)
+
+
+def with_origin(content, request):
+    """
+    Replace the origin placeholder in rendered document bytes.
+    """
+    origin = request.build_absolute_uri("/").rstrip("/")
+    return content.replace(
+        f'"{ORIGIN_PLACEHOLDER}'.encode(), f'"{origin}'.encode()
+    )
+
+
+def render_cards(goods):
+    """
+    Render list cards for ``goods`` the way their documents store them.
+    """
+    data = GoodListSerializer(
+        goods, many=True, context={"request": DocumentRequest()}
+    ).data
+    return [render_json(item) for item in data]
+
+
+def refresh_documents(goods=None, batch_size=200):
+    """
+    Re-render the documents of ``goods`` (a Good queryset), or of every good.
+    Return the number of documents written.
+    """
+    goods = (Good.objects.all() if goods is None else goods).order_by("id")
+    context = {"request": DocumentRequest()}
+    refreshed = 0
+    last_id = 0
+    while ids := list(
+        goods.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size]
+    ):
+        last_id = ids[-1]
+        batch = list(
+            Good.objects.filter(id__in=ids)
+            .order_by("id")
+            .select_related("category__group", "brand")
+            .prefetch_related(
+                "attribute_values__attribute__group", "images", "reviews__user"
+            )
+        )
+        details = GoodSerializer(batch, many=True, context=context).data
+        cards = GoodListSerializer(batch, many=True, context=context).data
+        GoodDocument.objects.bulk_create(
+            [
+                GoodDocument(
+                    good_id=good.pk,
+                    detail=render_json(detail).decode(),
+                    card=render_json(card).decode(),
+                    good_updated_at=good.updated_at,
+                )
+                for good, detail, card in zip(batch, details, cards)
+            ],
+            update_conflicts=True,
+            unique_fields=["good"],
+            update_fields=["detail", "card", "good_updated_at", "rendered_at"],
+        )
+        refreshed += len(batch)
+    return refreshed
+
+
+class DocumentQueue:
+    """
+    Coalesces refresh requests and renders them on a single background thread.
+
+    Requests arriving while a refresh is pending join it, so a burst of
+    changes to one good renders its document once. With
+    ``GOOD_DOCUMENTS_ASYNC = False`` refreshes run inline instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._good_ids = set()
+        self._conditions = []
+        self._scheduled = False
+
+    def add(self, good_ids=(), condition=None):
+        with self._lock:
+            self._good_ids.update(good_ids)
+            if condition is not None:
+                self._conditions.append(condition)
+            if self._scheduled:
+                return
+            self._scheduled = True
+            run_async = getattr(settings, "GOOD_DOCUMENTS_ASYNC", True)
+            if run_async and self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="good-documents"
+                )
+        if run_async:
+            self._executor.submit(self._run)
+        else:
+            self._drain()
+
+    def _run(self):
+        close_old_connections()
+        try:
+            self._drain()
+        finally:
+            close_old_connections()
+
+    def _drain(self):
+        with self._lock:
+            good_ids, conditions = self._good_ids, self._conditions
+            self._good_ids, self._conditions = set(), []
+            self._scheduled = False
+        condition = Q(pk__in=good_ids)
+        for extra in conditions:
+            condition |= extra
+        # Broad conditions (a category, the whole catalog) mostly match goods
+        # whose documents are already current; only stale ones are rendered.
+        goods = Good.objects.filter(condition).exclude(
+            document__good_updated_at=F("updated_at")
+        )
+        try:
+            refresh_documents(goods)
+        except Exception:
+            # Stale documents are never served, so a failed refresh only
+            # costs speed until the next change or request retries it.
+            logger.exception("Refreshing good documents failed")
+
+
+document_queue = DocumentQueue()
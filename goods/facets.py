@@ -0,0 +1,431 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from goods.attribute_filters import AttributeFilterRegistry
+from goods.models import Good, Brand, Category, Attribute, AttributeValue
+from goods.versions import VersionedIndex
+
+PRICE_BUCKETS = (0, 1000, 5000, 10000, 20000, 50000)
+# GoodFilter parameters the index cannot answer; they are resolved in the
+# database and passed to ``facet_counts`` as a restriction.
+RESIDUAL_FILTERS = ("search", "min_price", "max_price")
+
+
+class Bitset:
+    """
+    Set of small integers stored as a Python int shifted by ``offset``.
+
+    Goods are numbered by category, so most attribute and brand sets only cover
+    a narrow window of positions; trimming the leading zero bits keeps those
+    sets small while AND/OR/popcount stay native int operations.
+    """
+
+    __slots__ = ("offset", "bits")
+
+    def __init__(self, offset=0, bits=0):
+        self.offset = offset
+        self.bits = bits
+
+    @classmethod
+    def from_positions(cls, positions):
+        bitset = cls()
+        for position in positions:
+            bitset.add(position)
+        return bitset
+
+    def add(self, position):
+        if not self.bits:
+            self.offset, self.bits = position, 1
+        elif position < self.offset:
+            self.bits = (self.bits << (self.offset - position)) | 1
+            self.offset = position
+        else:
+            self.bits |= 1 << (position - self.offset)
+
+    def discard(self, position):
+        if self.bits and position >= self.offset:
+            self.bits &= ~(1 << (position - self.offset))
+
+    def count(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return bool(self.bits)
+
+    def __and__(self, other):
+        if not self.bits or not other.bits:
+            return Bitset()
+        low = max(self.offset, other.offset)
+        high = min(
+            self.offset + self.bits.bit_length(), other.offset + other.bits.bit_length()
+        )
+        if low >= high:
+            return Bitset()
+        return Bitset(
+            low, (self.bits >> (low - self.offset)) & (other.bits >> (low - other.offset))
+        )
+
+    def __or__(self, other):
+        if not self.bits:
+            return Bitset(other.offset, other.bits)
+        if not other.bits:
+            return Bitset(self.offset, self.bits)
+        low = min(self.offset, other.offset)
+        return Bitset(
+            low, (self.bits << (self.offset - low)) | (other.bits << (other.offset - low))
+        )
+
+    def __sub__(self, other):
+        if not self.bits or not other.bits:
+            return Bitset(self.offset, self.bits)
+        return Bitset(self.offset, self.bits & ~(self & other).shifted_to(self.offset))
+
+    def shifted_to(self, offset):
+        return self.bits << (self.offset - offset) if self.bits else 0
+
+
+def union(bitsets):
+    result = Bitset()
+    for bitset in bitsets:
+        result = result | bitset
+    return result
+
+
+def intersection(bitsets):
+    bitsets = list(bitsets)
+    if not bitsets:
+        return None
+    result = bitsets[0]
+    for bitset in bitsets[1:]:
+        result = result & bitset
+    return result
+
+
+class FacetIndex(VersionedIndex):
+    """
+    In-memory facet counts for the goods catalog.
+
+    Every good gets a dense position (ordered by category) and each brand,
+    category, (attribute, value) pair, price bucket and stock/sale flag maps to
+    a Bitset of positions. Facet counts for a filter set are intersections and
+    popcounts instead of COUNT joins.
+    """
+
+    version_name = "facets"
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self.positions = {}
+        self.goods = {}
+        self.everything = Bitset()
+        self.in_stock = Bitset()
+        self.on_sale = Bitset()
+        self.by_brand = defaultdict(Bitset)
+        self.by_category = defaultdict(Bitset)
+        self.by_attribute_value = defaultdict(Bitset)
+        self.by_price_bucket = defaultdict(Bitset)
+        self.brands = {}
+        self.categories = {}
+        self.attributes = {}
+
+    @staticmethod
+    def price_bucket(price):
+        bucket = 0
+        for index, lower_bound in enumerate(PRICE_BUCKETS):
+            if price >= lower_bound:
+                bucket = index
+        return bucket
+
+    def build(self):
+        self._reset()
+        self.brands = {
+            brand_id: {"id": brand_id, "name": name, "slug": slug}
+            for brand_id, name, slug in Brand.objects.values_list("id", "name", "slug")
+        }
+        self.categories = {
+            category_id: {
+                "id": category_id,
+                "name": name,
+                "slug": slug,
+                "group_id": group_id,
+                "group_name": group_name,
+            }
+            for category_id, name, slug, group_id, group_name in Category.objects.values_list(
+                "id", "name", "slug", "group_id", "group__name"
+            )
+        }
+        self.attributes = {
+            attribute_id: {
+                "id": attribute_id,
+                "name": name,
+                "slug": slug,
+                "is_filter": is_filter,
+            }
+            for attribute_id, name, slug, is_filter in Attribute.objects.values_list(
+                "id", "name", "slug", "is_filter"
+            )
+        }
+
+        attribute_values = defaultdict(dict)
+        for good_id, attribute_id, value in (
+            AttributeValue.objects.order_by()
+            .values_list("good_id", "attribute_id", "value")
+            .iterator()
+        ):
+            attribute_values[good_id][attribute_id] = value
+
+        goods = Good.objects.order_by("category_id", "id").values_list(
+            "id", "category_id", "brand_id", "quantity", "sale_percent", "price"
+        )
+        for good_id, category_id, brand_id, quantity, sale_percent, price in goods.iterator():
+            self._add_good(
+                good_id,
+                {
+                    "category_id": category_id,
+                    "brand_id": brand_id,
+                    "in_stock": bool(quantity),
+                    "on_sale": bool(sale_percent),
+                    "price_bucket": self.price_bucket(price or Decimal(0)),
+                    "attributes": attribute_values.get(good_id, {}),
+                },
+            )
+
+    def _add_good(self, good_id, entry):
+        position = self.positions.get(good_id)
+        if position is None:
+            position = self.positions[good_id] = len(self.positions)
+        self.goods[good_id] = entry
+        self.everything.add(position)
+        if entry["in_stock"]:
+            self.in_stock.add(position)
+        if entry["on_sale"]:
+            self.on_sale.add(position)
+        self.by_category[entry["category_id"]].add(position)
+        self.by_brand[entry["brand_id"]].add(position)
+        self.by_price_bucket[entry["price_bucket"]].add(position)
+        for attribute_id, value in entry["attributes"].items():
+            self.by_attribute_value[(attribute_id, value)].add(position)
+
+    def _remove_good(self, good_id):
+        entry = self.goods.pop(good_id, None)
+        if entry is None:
+            return None
+        position = self.positions[good_id]
+        for bitset in (self.everything, self.in_stock, self.on_sale):
+            bitset.discard(position)
+        self.by_category[entry["category_id"]].discard(position)
+        self.by_brand[entry["brand_id"]].discard(position)
+        self.by_price_bucket[entry["price_bucket"]].discard(position)
+        for attribute_id, value in entry["attributes"].items():
+            self.by_attribute_value[(attribute_id, value)].discard(position)
+        return entry
+
+    # Incremental updates, called from signal handlers after commit and
+    # replayed by every process from the change log.
+
+    def _update_good(self, good_id, category_id, brand_id, quantity, sale_percent, price):
+        previous = self._remove_good(good_id)
+        self._add_good(
+            good_id,
+            {
+                "category_id": category_id,
+                "brand_id": brand_id,
+                "in_stock": bool(quantity),
+                "on_sale": bool(sale_percent),
+                "price_bucket": self.price_bucket(price or Decimal(0)),
+                "attributes": previous["attributes"] if previous else {},
+            },
+        )
+
+    def _set_attribute_value(self, good_id, attribute_id, value):
+        entry = self._remove_good(good_id)
+        if entry is None:
+            return
+        attributes = dict(entry["attributes"])
+        if value is None:
+            attributes.pop(attribute_id, None)
+        else:
+            attributes[attribute_id] = value
+        self._add_good(good_id, {**entry, "attributes": attributes})
+
+    def update_good(self, good_id, category_id, brand_id, quantity, sale_percent, price):
+        self.apply_change(
+            "_update_good", good_id, category_id, brand_id, quantity, sale_percent, price
+        )
+
+    def remove_good(self, good_id):
+        self.apply_change("_remove_good", good_id)
+
+    def set_attribute_value(self, good_id, attribute_id, value):
+        self.apply_change("_set_attribute_value", good_id, attribute_id, value)
+
+    # Queries.
+
+    def _bitset_for_ids(self, good_ids):
+        return Bitset.from_positions(
+            self.positions[good_id] for good_id in good_ids if good_id in self.goods
+        )
+
+    def _selections(self, params):
+        """
+        Translate GoodFilter parameters into one Bitset per facet dimension.
+        """
+        selections = {}
+
+        category = params.get("category")
+        if category:
+            selections["category"] = union(
+                self.by_category[category_id]
+                for category_id, data in self.categories.items()
+                if data["name"].lower() == category.lower()
+            )
+
+        group = params.get("group")
+        if group:
+            selections["group"] = union(
+                self.by_category[category_id]
+                for category_id, data in self.categories.items()
+                if (data["group_name"] or "").lower() == group.lower()
+            )
+
+        brand = params.get("brand")
+        if brand:
+            brand_names = {name.strip() for name in brand.split(",")}
+            selections["brand"] = union(
+                self.by_brand[brand_id]
+                for brand_id, data in self.brands.items()
+                if data["name"] in brand_names
+            )
+
+        for attribute_id, data in self.attributes.items():
+            raw_values = params.get(AttributeFilterRegistry.filter_name(data["name"]))
+            if raw_values:
+                values = [value.strip() for value in raw_values.split(",")]
+                key = f"attribute:{data['name']}"
+                selection = union(
+                    self.by_attribute_value[(attribute_id, value)] for value in values
+                )
+                selections[key] = selections.get(key, Bitset()) | selection
+
+        sale = params.get("sale_percent")
+        if sale and sale.lower() == "true":
+            selections["sale"] = self.on_sale
+
+        stock = (params.get("in_stock") or "true").lower()
+        if stock == "true":
+            selections["in_stock"] = self.in_stock
+        elif stock == "false":
+            selections["in_stock"] = self.everything - self.in_stock
+
+        return selections
+
+    def _matching(self, selections, restrict, exclude=None):
+        parts = [self.everything]
+        if restrict is not None:
+            parts.append(restrict)
+        parts.extend(
+            selection for name, selection in selections.items() if name != exclude
+        )
+        return intersection(parts)
+
+    def facet_counts(self, params, restrict_ids=None):
+        """
+        Return every facet count for ``params`` in one pass.
+
+        Each dimension is counted against the other active filters only, so a
+        selected brand does not hide the counts of the remaining brands.
+        ``restrict_ids`` (ids or an id queryset) narrows the result to goods
+        matched by filters the index does not cover (search, price range).
+        """
+        if restrict_ids is not None:
+            # Run the query before taking the lock.
+            restrict_ids = list(restrict_ids)
+        self.ensure_current()
+        with self._lock:
+            restrict = None
+            if restrict_ids is not None:
+                restrict = self._bitset_for_ids(restrict_ids)
+            selections = self._selections(params)
+            matching = self._matching(selections, restrict)
+
+            without_brand = self._matching(selections, restrict, exclude="brand")
+            brands = []
+            for brand_id, bitset in self.by_brand.items():
+                count = (without_brand & bitset).count()
+                if count and brand_id in self.brands:
+                    brands.append({**self.brands[brand_id], "count": count})
+
+            without_category = self._matching(selections, restrict, exclude="category")
+            categories = []
+            for category_id, bitset in self.by_category.items():
+                count = (without_category & bitset).count()
+                if count and category_id in self.categories:
+                    data = self.categories[category_id]
+                    categories.append(
+                        {
+                            "id": category_id,
+                            "name": data["name"],
+                            "slug": data["slug"],
+                            "count": count,
+                        }
+                    )
+
+            attribute_values = defaultdict(list)
+            attribute_bases = {}
+            for (attribute_id, value), bitset in self.by_attribute_value.items():
+                data = self.attributes.get(attribute_id)
+                if data is None or not data["is_filter"]:
+                    continue
+                if attribute_id not in attribute_bases:
+                    attribute_bases[attribute_id] = self._matching(
+                        selections, restrict, exclude=f"attribute:{data['name']}"
+                    )
+                count = (attribute_bases[attribute_id] & bitset).count()
+                if count:
+                    attribute_values[attribute_id].append({"value": value, "count": count})
+            attributes = [
+                {
+                    "id": attribute_id,
+                    "name": self.attributes[attribute_id]["name"],
+                    "slug": self.attributes[attribute_id]["slug"],
+                    "values": sorted(values, key=lambda item: item["value"]),
+                }
+                for attribute_id, values in attribute_values.items()
+            ]
+
+            price = []
+            for index, lower_bound in enumerate(PRICE_BUCKETS):
+                upper_bound = (
+                    PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+                )
+                price.append(
+                    {
+                        "min": lower_bound,
+                        "max": upper_bound,
+                        "count": (matching & self.by_price_bucket[index]).count(),
+                    }
+                )
+
+            without_stock = self._matching(selections, restrict, exclude="in_stock")
+            in_stock_count = (without_stock & self.in_stock).count()
+
+            return {
+                "total": matching.count(),
+                "categories": sorted(categories, key=lambda item: item["name"]),
+                "brands": sorted(brands, key=lambda item: item["name"]),
+                "attributes": sorted(attributes, key=lambda item: item["name"]),
+                "price": price,
+                "in_stock": {
+                    "true": in_stock_count,
+                    "false": without_stock.count() - in_stock_count,
+                },
+                "on_sale": (
+                    self._matching(selections, restrict, exclude="sale") & self.on_sale
+                ).count(),
+            }
+
+
+facet_index = FacetIndex()
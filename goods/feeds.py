@@ -0,0 +1,207 @@
+import csv
+import io
+import re
+import zlib
+from xml.sax.saxutils import escape, quoteattr
+
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.throttling import UserRateThrottle
+
+from goods.models import Good
+from goods.renderers import FastJSONRenderer
+
+FEED_FORMATS = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+    "xml": "application/xml",
+}
+FEED_FIELDS = [
+    "id",
+    "slug",
+    "name",
+    "category",
+    "brand",
+    "price",
+    "final_price",
+    "sale_percent",
+    "quantity",
+    "in_stock",
+    "image",
+    "images",
+    "description",
+    "attributes",
+    "updated_at",
+]
+# Control characters are not allowed anywhere in an XML 1.0 document.
+XML_INVALID_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Output is handed to the client in pieces of about this size rather than one
+# write per good.
+FLUSH_SIZE = 64 * 1024
+
+
+class FeedContentNegotiation(DefaultContentNegotiation):
+    """
+    Feeds choose their format from a query parameter, so an Accept header
+    naming CSV or XML must not be answered with 406; errors still use JSON.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class FeedRateThrottle(UserRateThrottle):
+    """
+    Each feed request reads the whole catalog, so it gets its own, much
+    lower rate (``DEFAULT_THROTTLE_RATES["feed"]``) per user.
+    """
+
+    scope = "feed"
+
+
+def iter_feed_goods(goods=None, chunk_size=1000):
+    """
+    Yield ``goods`` (a Good queryset, or the whole catalog) by ascending id.
+
+    Each chunk is one keyset query plus one prefetch query per relation, so
+    memory holds a single chunk however large the catalog is.
+    """
+    goods = (Good.objects.all() if goods is None else goods).order_by("id")
+    goods = goods.select_related("category", "brand").prefetch_related(
+        "images", "attribute_values__attribute"
+    )
+    last_id = 0
+    while chunk := list(goods.filter(id__gt=last_id)[:chunk_size]):
+        yield from chunk
+        last_id = chunk[-1].pk
+
+
+def feed_item(good, build_url):
+    """
+    Flat representation of a good; the JSONL and CSV feeds can be read back
+    by ``import_catalog``.
+    """
+
+    def file_url(field):
+        return build_url(field.url) if field else None
+
+    return {
+        "id": good.pk,
+        "slug": good.slug,
+        "name": good.name,
+        "category": good.category.name,
+        "brand": good.brand.name,
+        "price": str(good.price),
+        "final_price": str(good.final_price),
+        "sale_percent": good.sale_percent,
+        "quantity": good.quantity,
+        "in_stock": bool(good.quantity),
+        "image": file_url(good.image),
+        "images": [
+            url for url in (file_url(image.image) for image in good.images.all()) if url
+        ],
+        "description": good.description,
+        "attributes": {
+            value.attribute.name: value.value for value in good.attribute_values.all()
+        },
+        "updated_at": good.updated_at.isoformat(),
+    }
+
+
+def render_jsonl(items):
+    renderer = FastJSONRenderer()
+    for item in items:
+        yield renderer.render(item) + b"\n"
+
+
+def render_csv(items):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FEED_FIELDS)
+    writer.writeheader()
+    renderer = FastJSONRenderer()
+    for item in items:
+        writer.writerow(
+            {
+                **item,
+                "images": " ".join(item["images"]),
+                "attributes": renderer.render(item["attributes"]).decode(),
+            }
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def xml_text(value):
+    return escape(XML_INVALID_CHARS.sub("", str(value)))
+
+
+def xml_attribute(value):
+    return quoteattr(XML_INVALID_CHARS.sub("", str(value)))
+
+
+def render_xml(items):
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<goods>\n'
+    for item in items:
+        parts = [f"<good id=\"{item['id']}\">"]
+        for name in FEED_FIELDS[1:]:
+            value = item[name]
+            if name == "images":
+                parts.append(
+                    "<images>"
+                    + "".join(f"<image>{xml_text(url)}</image>" for url in value)
+                    + "</images>"
+                )
+            elif name == "attributes":
+                parts.append(
+                    "<attributes>"
+                    + "".join(
+                        f"<attribute name={xml_attribute(key)}>{xml_text(text)}</attribute>"
+                        for key, text in value.items()
+                    )
+                    + "</attributes>"
+                )
+            elif value is None:
+                parts.append(f"<{name}/>")
+            else:
+                if isinstance(value, bool):
+                    value = "true" if value else "false"
+                parts.append(f"<{name}>{xml_text(value)}</{name}>")
+        parts.append("</good>\n")
+        yield "".join(parts).encode()
+    yield b"</goods>\n"
+
+
+RENDERERS = {"jsonl": render_jsonl, "csv": render_csv, "xml": render_xml}
+
+
+def buffered(chunks, size=FLUSH_SIZE):
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= size:
+            yield b"".join(pending)
+            pending, pending_size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+def gzipped(chunks, level=6):
+    """
+    Compress a byte stream into one gzip member as it is produced.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_feed(feed_format, build_url, goods=None, chunk_size=1000, compress=False):
+    """
+    Yield the bytes of a feed of ``goods`` in ``feed_format``.
+    """
+    items = (feed_item(good, build_url) for good in iter_feed_goods(goods, chunk_size))
+    chunks = buffered(RENDERERS[feed_format](items))
+    return gzipped(chunks) if compress else chunks
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.functions import Now
+
+from goods.conditional import GOODS_VERSION
+from goods.documents import document_queue
+from goods.images import delete_variants, image_fields
+from goods.models import Good, ProductImage
+from goods.response_cache import invalidate_good
+from goods.versions import bump_version
+
+IMAGE_MODELS = (Good, ProductImage)
+
+
+def claim_images(model, limit):
+    """
+    Mark up to ``limit`` pending images of ``model`` as processing and return
+    their ``(pk, name)``. Rows locked by another worker are skipped.
+    """
+    with transaction.atomic():
+        rows = list(
+            model.objects.filter(image_status="pending")
+            .order_by("id")
+            .select_for_update(skip_locked=True)
+            .values_list("id", "image")[:limit]
+        )
+        model.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+            image_status="processing"
+        )
+    return rows
+
+
+def release_images(model, pks):
+    """
+    Put claimed images back in the queue, e.g. when a worker stops early.
+    """
+    model.objects.filter(pk__in=pks, image_status="processing").update(
+        image_status="pending"
+    )
+
+
+def store_variants(model, pk, name, rendered):
+    """
+    Save the rendered variants and metadata of a claimed image and return the
+    good it belongs to. If the image was replaced meanwhile the files are
+    dropped instead and None is returned; the new image is already queued.
+    """
+    updated = model.objects.filter(pk=pk, image=name, image_status="processing").update(
+        **image_fields(name, rendered)
+    )
+    if not updated:
+        if rendered:
+            storage = model._meta.get_field("image").storage
+            delete_variants(storage, rendered["image_variants"])
+        return None
+    if model is Good:
+        return pk
+    return model.objects.filter(pk=pk).values_list("good_id", flat=True).first()
+
+
+def images_changed(good_ids):
+    """
+    Variants are part of the good payload: touch the goods, then refresh
+    their cached responses and documents.
+    """
+    good_ids = [good_id for good_id in set(good_ids) if good_id]
+    if not good_ids:
+        return
+    Good.objects.filter(pk__in=good_ids).update(updated_at=Now())
+    bump_version(GOODS_VERSION)
+    for good_id in good_ids:
+        invalidate_good(good_id=good_id)
+    document_queue.add(good_ids=good_ids)
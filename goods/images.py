@@ -0,0 +1,218 @@
+import base64
+import io
+import logging
+import posixpath
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageFilter, ImageOps
+
+# name -> bounding box; derivatives keep the aspect ratio and are never
+# upscaled, so a small original yields variants of its own size.
+IMAGE_VARIANTS = {
+    "thumbnail": (160, 160),
+    "card": (480, 480),
+    "zoom": (1600, 1600),
+}
+WEBP_QUALITY = 80
+# Inline blurred preview, about 200 bytes of base64 WebP.
+PLACEHOLDER_SIZE = (16, 16)
+PLACEHOLDER_QUALITY = 40
+# Values stored for an image without rendered variants or metadata.
+EMPTY_IMAGE_FIELDS = {
+    "image_variants": {},
+    "image_width": None,
+    "image_height": None,
+    "image_color": "",
+    "image_placeholder": "",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def variant_name(name, variant):
+    """
+    ``goods/abc.jpg`` -> ``goods/abc.card.webp``, next to the original.
+    """
+    root, _ = posixpath.splitext(name)
+    return f"{root}.{variant}.webp"
+
+
+def open_image(storage, name):
+    with storage.open(name, "rb") as source:
+        image = Image.open(source)
+        image.load()
+    # Phones store rotation in EXIF; bake it in since WebP output drops it.
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    return image
+
+
+def image_size(storage, name):
+    """
+    Displayed ``(width, height)`` of the image ``name``, read from its header
+    without decoding the pixels.
+    """
+    with storage.open(name, "rb") as source:
+        image = Image.open(source)
+        width, height = image.size
+        # Orientations 5-8 rotate by 90 degrees.
+        if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+            width, height = height, width
+    return width, height
+
+
+def image_metadata(image):
+    """
+    Dimensions, dominant color and base64 LQIP placeholder of a decoded
+    image, as model field values.
+    """
+    small = image.copy()
+    small.thumbnail(PLACEHOLDER_SIZE, Image.LANCZOS, reducing_gap=2.0)
+    opaque = small
+    if small.mode == "RGBA":
+        # Transparent areas show the page background; assume white.
+        opaque = Image.new("RGBA", small.size, "white")
+        opaque = Image.alpha_composite(opaque, small).convert("RGB")
+    paletted = opaque.quantize(colors=8)
+    _, index = max(paletted.getcolors())
+    red, green, blue = paletted.getpalette()[index * 3 : index * 3 + 3]
+    buffer = io.BytesIO()
+    small.filter(ImageFilter.GaussianBlur(1)).save(
+        buffer, "WEBP", quality=PLACEHOLDER_QUALITY
+    )
+    placeholder = base64.b64encode(buffer.getvalue()).decode()
+    return {
+        "image_width": image.width,
+        "image_height": image.height,
+        "image_color": f"#{red:02x}{green:02x}{blue:02x}",
+        "image_placeholder": f"data:image/webp;base64,{placeholder}",
+    }
+
+
+def render_variants(storage, name, image=None):
+    """
+    Write the WebP derivatives of the image ``name`` next to it and return
+    their ``{variant: {"name", "width", "height"}}`` description.
+    """
+    if image is None:
+        image = open_image(storage, name)
+    variants = {}
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+        target = variant_name(name, variant)
+        if storage.exists(target):
+            storage.delete(target)
+        target = storage.save(target, ContentFile(buffer.getvalue()))
+        variants[variant] = {
+            "name": target,
+            "width": resized.width,
+            "height": resized.height,
+        }
+    return variants
+
+
+def render_image(storage, name):
+    """
+    Render the variants of the image ``name`` and measure it in one decode;
+    returns model field values.
+    """
+    image = open_image(storage, name)
+    return {
+        "image_variants": render_variants(storage, name, image),
+        **image_metadata(image),
+    }
+
+
+def try_render_image(storage, name):
+    """
+    ``render_image``, or None when the image cannot be read.
+    """
+    try:
+        return render_image(storage, name)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning("Cannot render variants of %s", name, exc_info=True)
+        return None
+
+
+def render_job(model_label, name):
+    """
+    Process pool entry point: render the variants and metadata of an image of
+    ``model_label`` by storage name, without touching the database.
+    """
+    storage = apps.get_model(model_label)._meta.get_field("image").storage
+    return try_render_image(storage, name)
+
+
+def image_status(name, rendered):
+    if not name:
+        return "none"
+    return "ready" if rendered else "failed"
+
+
+def image_fields(name, rendered):
+    """
+    Field values to store for the image ``name`` from a ``render_image``
+    result, or None when it failed.
+    """
+    return {
+        **EMPTY_IMAGE_FIELDS,
+        **(rendered or {}),
+        "image_status": image_status(name, rendered),
+    }
+
+
+def pending_image_fields(storage, name):
+    """
+    Field values of an image queued for the worker. The dimensions come from
+    the file header right away so pages can reserve space meanwhile.
+    """
+    fields = {**EMPTY_IMAGE_FIELDS, "image_status": "pending"}
+    try:
+        fields["image_width"], fields["image_height"] = image_size(storage, name)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        pass
+    return fields
+
+
+def refresh_variants(instance):
+    """
+    Render the variants and metadata of ``instance.image`` right away and
+    store them and the resulting status on the row without sending save
+    signals.
+    """
+    name = instance.image.name if instance.image else ""
+    rendered = try_render_image(instance.image.storage, name) if name else None
+    fields = image_fields(name, rendered)
+    for field, value in fields.items():
+        setattr(instance, field, value)
+    type(instance).objects.filter(pk=instance.pk).update(**fields)
+    return instance.image_variants
+
+
+def delete_variants(storage, variants, keep=()):
+    """
+    Delete stored variant files, except names listed in ``keep``.
+    """
+    for variant in (variants or {}).values():
+        if variant["name"] not in keep:
+            storage.delete(variant["name"])
+
+
+def variant_urls(field_file, variants, request=None):
+    """
+    Public description of stored variants, with absolute URLs when a request
+    is available.
+    """
+    result = {}
+    for variant, data in (variants or {}).items():
+        url = field_file.storage.url(data["name"])
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        result[variant] = {"url": url, "width": data["width"], "height": data["height"]}
+    return result
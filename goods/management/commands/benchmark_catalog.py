@@ -0,0 +1,219 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from goods.attribute_filters import attribute_filter_registry
+from goods.attribute_index import attribute_index
+from goods.models import Good, Category, Brand, Group, Attribute, AttributeValue
+from goods.search import build_search_document, get_search_backend
+from goods.views import GoodViewSet
+
+PREFIX = "bench"
+ATTRIBUTE_VALUES = ["red", "green", "blue", "black", "white", "silver", "gold", "grey"]
+WORDS = ["phone", "laptop", "tablet", "camera", "speaker", "monitor", "router", "watch"]
+SEED_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic catalog inside a transaction that is rolled back, then "
+        "print query plans and timings of the main goods listing queries, next "
+        "to their former JOIN + DISTINCT shape."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goods", type=int, default=100000)
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--brands", type=int, default=200)
+        parser.add_argument("--attributes", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--no-explain", action="store_true", help="Print timings only."
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.repeat = options["repeat"]
+        self.explain = not options["no_explain"]
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                self.seed(options)
+                self.stdout.write(
+                    f"Seeded {options['goods']} goods in "
+                    f"{time.perf_counter() - started:.1f}s on {connection.vendor}."
+                )
+                for label, params in self.get_cases():
+                    self.run_case(label, params)
+                transaction.set_rollback(True)
+        finally:
+            # These may have been built from the seeded rows.
+            attribute_filter_registry.invalidate()
+            attribute_index.invalidate()
+
+    # Seeding.
+
+    def seed(self, options):
+        group = Group.objects.create(name=f"{PREFIX} group", slug=f"{PREFIX}-group")
+        self.categories = Category.objects.bulk_create(
+            Category(
+                name=f"{PREFIX} category {i}",
+                slug=f"{PREFIX}-category-{i}",
+                group=group,
+            )
+            for i in range(options["categories"])
+        )
+        self.brands = Brand.objects.bulk_create(
+            Brand(name=f"{PREFIX} brand {i}", slug=f"{PREFIX}-brand-{i}")
+            for i in range(options["brands"])
+        )
+        self.attributes = Attribute.objects.bulk_create(
+            Attribute(name=f"{PREFIX} attribute {i}", slug=f"{PREFIX}-attribute-{i}")
+            for i in range(options["attributes"])
+        )
+        for attribute in self.attributes:
+            attribute.categories.set(self.categories)
+
+        backend = get_search_backend()
+        remaining = options["goods"]
+        number = 0
+        while remaining > 0:
+            goods = []
+            for _ in range(min(remaining, SEED_BATCH_SIZE)):
+                goods.append(self.build_good(number))
+                number += 1
+            remaining -= len(goods)
+            Good.objects.bulk_create(goods)
+            if goods[0].pk is None:
+                slugs = [good.slug for good in goods]
+                ids = dict(
+                    Good.objects.filter(slug__in=slugs).values_list("slug", "id")
+                )
+                for good in goods:
+                    good.pk = ids[good.slug]
+            AttributeValue.objects.bulk_create(
+                AttributeValue(
+                    good_id=good.pk,
+                    attribute=attribute,
+                    value=self.random.choice(ATTRIBUTE_VALUES),
+                )
+                for good in goods
+                for attribute in self.attributes
+            )
+            backend.index({good.pk: good.search_document for good in goods})
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def build_good(self, number):
+        category = self.random.choice(self.categories)
+        brand = self.random.choice(self.brands)
+        name = f"{self.random.choice(WORDS)} {PREFIX} {number}"
+        return Good(
+            name=name,
+            slug=f"{PREFIX}-good-{number}",
+            category=category,
+            brand=brand,
+            price=Decimal(self.random.randint(100, 500000)) / 100,
+            sale_percent=self.random.choice([None, 0, 0, 10, 25]),
+            quantity=self.random.choice([0, 1, 5, 20, 100]),
+            reviews_count=self.random.randint(0, 300),
+            search_document=build_search_document(name, brand.name, category.name, []),
+        )
+
+    # Measuring.
+
+    def get_cases(self):
+        category = self.random.choice(self.categories)
+        brands = self.random.sample(self.brands, 3)
+        attributes = [
+            attribute_filter_registry.filter_name(attribute.name)
+            for attribute in self.attributes
+        ]
+        return [
+            ("in stock", {}),
+            ("price ascending", {"sort": "price_asc"}),
+            ("category by price", {"category": category.name, "sort": "price_asc"}),
+            ("brands", {"brand": ",".join(brand.name for brand in brands)}),
+            ("price range", {"min_price": "100", "max_price": "500"}),
+            ("popularity", {"sort": "popularity"}),
+            ("attribute", {attributes[0]: "red,blue"}),
+            (
+                "all attributes",
+                {name: value for name, value in zip(attributes, ATTRIBUTE_VALUES)},
+            ),
+            ("search", {"search": "phone"}),
+        ]
+
+    def build_queryset(self, params):
+        """
+        The queryset ``GoodViewSet.list`` paginates for ``params``.
+        """
+        view = GoodViewSet()
+        view.request = Request(APIRequestFactory().get("/api/v1/good/", params))
+        view.action = "list"
+        view.kwargs = {}
+        view.format_kwarg = None
+        return view.filter_queryset(view.get_queryset()).filter(quantity__gt=0)
+
+    def build_join_queryset(self, params):
+        """
+        The same listing in its former shape: attribute filters as joins and
+        DISTINCT over the whole row. Kept as a baseline for the current shape.
+        """
+        filter_names = {
+            attribute_filter_registry.filter_name(attribute.name): attribute.name
+            for attribute in self.attributes
+        }
+        queryset = self.build_queryset(
+            {name: value for name, value in params.items() if name not in filter_names}
+        )
+        for name, value in params.items():
+            if name in filter_names:
+                queryset = queryset.filter(
+                    attribute_values__attribute__name=filter_names[name],
+                    attribute_values__value__in=value.split(","),
+                )
+        return queryset.distinct()
+
+    def measure(self, query):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def report(self, name, build, params):
+        """
+        Time ``build(params)`` plus its count and first page; building is
+        included because filters may do work up front.
+        """
+        page_size = GoodViewSet.pagination_class.page_size
+        with CaptureQueriesContext(connection) as queries:
+            list(build(params)[:page_size])
+        count_ms = self.measure(lambda: build(params).count())
+        page_ms = self.measure(lambda: list(build(params)[:page_size]))
+        self.stdout.write(
+            f"{name}: count {count_ms:.1f} ms, first page {page_ms:.1f} ms, "
+            f"queries per page: {len(queries)}"
+        )
+
+    def run_case(self, label, params):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label} {params}"))
+        self.report("current", self.build_queryset, params)
+        self.report("join + distinct", self.build_join_queryset, params)
+        if self.explain:
+            page = self.build_queryset(params)[: GoodViewSet.pagination_class.page_size]
+            if connection.vendor == "postgresql":
+                self.stdout.write(page.explain(analyze=True, buffers=True))
+            else:
+                self.stdout.write(page.explain())
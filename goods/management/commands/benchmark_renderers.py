@@ -0,0 +1,80 @@
+import io
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from goods.models import Good
+from goods.renderers import FastJSONParser, FastJSONRenderer, orjson
+from goods.serializers import GoodListSerializer, GoodSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Render and parse serialized goods pages with the stock DRF JSON "
+        "renderer/parser and with the orjson-backed ones, and print timings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        self.repeat = options["repeat"]
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING("orjson is not installed; both sides use json.")
+            )
+
+        goods = list(
+            Good.objects.order_by("id")
+            .select_related("category__group", "brand")
+            .prefetch_related(
+                "attribute_values__attribute__group", "images", "reviews__user"
+            )[:page_size]
+        )
+        if not goods:
+            raise CommandError("There are no goods to serialize.")
+        context = {"request": Request(APIRequestFactory().get("/api/v1/good/"))}
+        pages = [
+            ("detail", GoodSerializer(goods, many=True, context=context).data),
+            ("list", GoodListSerializer(goods, many=True, context=context).data),
+        ]
+        for label, data in pages:
+            self.run_case(f"{label} page of {len(goods)} goods", data)
+
+    def measure(self, call):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def run_case(self, label, data):
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        content = stock.render(data)
+        if json.loads(fast.render(data)) != json.loads(content):
+            raise CommandError(f"{label}: renderers disagree.")
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(f"\n{label}, {len(content)} bytes")
+        )
+        stock_ms = self.measure(lambda: stock.render(data))
+        fast_ms = self.measure(lambda: fast.render(data))
+        self.stdout.write(
+            f"render: json {stock_ms:.2f} ms, fast {fast_ms:.2f} ms "
+            f"({stock_ms / fast_ms:.1f}x)"
+        )
+        stock_ms = self.measure(lambda: JSONParser().parse(io.BytesIO(content)))
+        fast_ms = self.measure(lambda: FastJSONParser().parse(io.BytesIO(content)))
+        self.stdout.write(
+            f"parse: json {stock_ms:.2f} ms, fast {fast_ms:.2f} ms "
+            f"({stock_ms / fast_ms:.1f}x)"
+        )
@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+from urllib.parse import urljoin
+
+from django.core.management.base import BaseCommand, CommandError
+
+from goods.feeds import FEED_FORMATS, stream_feed
+from goods.models import Good
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the catalog into a JSONL, CSV or XML feed file in keyset "
+        "chunks, gzipping on the fly for .gz paths or with --gzip."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file, or '-' to write to stdout.")
+        parser.add_argument("--format", choices=list(FEED_FORMATS))
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument(
+            "--base-url",
+            default="",
+            help="Prefix for media URLs, e.g. https://shop.example.com.",
+        )
+        parser.add_argument(
+            "--in-stock", action="store_true", help="Only export goods in stock."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        suffixes = [suffix.lstrip(".").lower() for suffix in Path(path).suffixes]
+        compress = options["gzip"] or suffixes[-1:] == ["gz"]
+        if suffixes[-1:] == ["gz"]:
+            suffixes.pop()
+        feed_format = options["format"] or (suffixes[-1] if suffixes else None)
+        if feed_format not in FEED_FORMATS:
+            raise CommandError("Cannot infer the feed format, pass --format.")
+
+        base_url = options["base_url"]
+        goods = Good.objects.all()
+        if options["in_stock"]:
+            goods = goods.filter(quantity__gt=0)
+
+        chunks = stream_feed(
+            feed_format,
+            lambda url: urljoin(base_url, url) if base_url else url,
+            goods,
+            chunk_size=options["chunk_size"],
+            compress=compress,
+        )
+        stream = sys.stdout.buffer if path == "-" else open(path, "wb")
+        written = 0
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if path != "-":
+                stream.close()
+        self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes."))
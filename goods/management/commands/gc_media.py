@@ -0,0 +1,105 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from goods.image_queue import images_changed
+from goods.models import Good, ProductImage
+from goods.storage import get_image_storage, is_content_name, referenced_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete image files no good or product image refers to. With --rehash, "
+        "first move files saved under legacy names to content-addressed ones, "
+        "so duplicates collapse into one blob."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Keep unreferenced files younger than this many seconds; "
+            "their rows may not be committed yet.",
+        )
+        parser.add_argument("--rehash", action="store_true")
+
+    def handle(self, *args, **options):
+        self.storage = get_image_storage()
+        self.dry_run = options["dry_run"]
+        if options["rehash"]:
+            self.rehash()
+
+        cutoff = timezone.now() - timedelta(seconds=options["min_age"])
+        referenced = referenced_names()
+        deleted = freed = 0
+        for name in self.walk(self.upload_directories()):
+            if name in referenced or self.storage.get_modified_time(name) > cutoff:
+                continue
+            size = self.storage.size(name)
+            if not self.dry_run:
+                self.storage.purge(name)
+            deleted += 1
+            freed += size
+            self.stdout.write(f"{'Would delete' if self.dry_run else 'Deleted'} {name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{deleted} orphaned files, {freed / 1024 / 1024:.1f} MB"
+                f"{' reclaimable' if self.dry_run else ' freed'}."
+            )
+        )
+
+    @staticmethod
+    def upload_directories():
+        return {
+            model._meta.get_field("image").upload_to.strip("/")
+            for model in (Good, ProductImage)
+        }
+
+    def walk(self, directories):
+        for directory in directories:
+            if not self.storage.exists(directory):
+                continue
+            subdirectories, files = self.storage.listdir(directory)
+            for name in files:
+                yield posixpath.join(directory, name)
+            yield from self.walk(
+                posixpath.join(directory, subdirectory)
+                for subdirectory in subdirectories
+            )
+
+    def rehash_name(self, name):
+        if is_content_name(name) or not self.storage.exists(name):
+            return name
+        with self.storage.open(name) as content:
+            return self.storage.save(name, content)
+
+    def rehash(self):
+        good_ids = []
+        for model in (Good, ProductImage):
+            rows = model.objects.exclude(image="").exclude(image__isnull=True)
+            for pk, name, variants, good_id in rows.values_list(
+                "id",
+                "image",
+                "image_variants",
+                "good_id" if model is ProductImage else "id",
+            ).iterator():
+                names = [name, *(variant["name"] for variant in variants.values())]
+                if all(is_content_name(item) for item in names):
+                    continue
+                self.stdout.write(f"Rehashing {name}")
+                if self.dry_run:
+                    continue
+                new_name = self.rehash_name(name)
+                new_variants = {
+                    key: {**variant, "name": self.rehash_name(variant["name"])}
+                    for key, variant in variants.items()
+                }
+                model.objects.filter(pk=pk, image=name).update(
+                    image=new_name, image_variants=new_variants
+                )
+                good_ids.append(good_id)
+        images_changed(good_ids)
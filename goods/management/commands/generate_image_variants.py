@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.db.models.functions import Now
+
+from goods.bulk import goods_changed_in_bulk
+from goods.images import refresh_variants
+from goods.models import Good, ProductImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the WebP derivatives and metadata of existing good and "
+        "product images that have none yet, in this process. See "
+        "process_images --backfill for the parallel version."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render images that have variants and metadata.",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        rendered = failed = 0
+        for model, fields in (
+            (Good, ["id", "image", "image_variants"]),
+            (ProductImage, ["id", "good_id", "image", "image_variants"]),
+        ):
+            images = model.objects.exclude(Q(image="") | Q(image__isnull=True))
+            if not options["force"]:
+                images = images.filter(Q(image_variants={}) | Q(image_placeholder=""))
+            images = images.only(*fields).order_by("id")
+            last_id = 0
+            while batch := list(images.filter(id__gt=last_id)[: options["batch_size"]]):
+                last_id = batch[-1].pk
+                for instance in batch:
+                    if refresh_variants(instance):
+                        rendered += 1
+                    else:
+                        failed += 1
+                        self.stderr.write(f"Cannot read {instance.image.name}")
+                # The variants are part of the goods' payload.
+                good_ids = [
+                    instance.pk if model is Good else instance.good_id
+                    for instance in batch
+                ]
+                Good.objects.filter(pk__in=good_ids).update(updated_at=Now())
+
+        if rendered:
+            goods_changed_in_bulk(slugs=None)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered variants of {rendered} images, {failed} failed."
+            )
+        )
@@ -0,0 +1,301 @@
+import csv
+import json
+import sys
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from goods.bulk import goods_changed_in_bulk
+from goods.models import (
+    Good,
+    Category,
+    Brand,
+    Attribute,
+    AttributeValue,
+    category_name_prefix,
+)
+from goods.search import refresh_search_documents
+from goods.units import parse_numeric_value
+
+GOOD_UPDATE_FIELDS = [
+    "name",
+    "category",
+    "brand",
+    "price",
+    "sale_percent",
+    "quantity",
+    "description",
+    "updated_at",
+]
+ATTRIBUTE_COLUMN_PREFIX = "attr:"
+# Past this many goods, one import evicts every cached detail page rather
+# than one tag per good.
+MAX_TAGGED_SLUGS = 10000
+
+
+class RowError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream goods from a CSV or JSONL feed into the catalog in chunks, "
+        "upserting goods on slug and attribute values on (good, attribute)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Feed file, or '-' to read from stdin.")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--create-missing",
+            action="store_true",
+            help="Create unknown categories, brands and attributes instead of skipping rows.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        feed_format = options["format"] or Path(path).suffix.lstrip(".").lower()
+        if feed_format not in ("csv", "jsonl"):
+            raise CommandError("Cannot infer the feed format, pass --format.")
+
+        self.create_missing = options["create_missing"]
+        self.load_maps()
+        self.changed_slugs = set()
+        self.changed_category_ids = set()
+
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            rows = self.read_rows(stream, feed_format)
+            imported = skipped = 0
+            while chunk := list(islice(rows, options["chunk_size"])):
+                chunk_imported, chunk_skipped = self.import_chunk(chunk)
+                imported += chunk_imported
+                skipped += chunk_skipped
+                self.stdout.write(f"Imported {imported} goods, skipped {skipped} rows.")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            # Once per import: every call drops the in-process indexes and
+            # makes each web process rebuild them.
+            if self.changed_slugs:
+                slugs = self.changed_slugs
+                category_ids = self.changed_category_ids
+                transaction.on_commit(
+                    lambda: goods_changed_in_bulk(
+                        slugs=slugs if len(slugs) <= MAX_TAGGED_SLUGS else None,
+                        category_ids=category_ids,
+                    )
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Done: {imported} goods imported, {skipped} rows skipped.")
+        )
+
+    # Lookups resolved once per run instead of once per row.
+
+    def load_maps(self):
+        self.categories = {}
+        self.name_prefixes = {}
+        for category_id, name in Category.objects.values_list("id", "name"):
+            self.categories.setdefault(name.lower(), category_id)
+            self.name_prefixes[category_id] = category_name_prefix(name)
+        self.brands = {
+            name.lower(): brand_id
+            for brand_id, name in Brand.objects.values_list("id", "name")
+        }
+        self.attributes = {}
+        self.numeric_units = {}
+        for attribute_id, name, is_numeric, unit in Attribute.objects.values_list(
+            "id", "name", "is_numeric", "unit"
+        ):
+            self.attributes[name.lower()] = attribute_id
+            if is_numeric:
+                self.numeric_units[attribute_id] = unit
+        self.attribute_categories = set(
+            Attribute.categories.through.objects.values_list(
+                "attribute_id", "category_id"
+            )
+        )
+
+    def resolve_category(self, name):
+        key = name.strip().lower()
+        if key not in self.categories:
+            if not self.create_missing:
+                raise RowError(f"unknown category {name!r}")
+            category = Category(name=name.strip(), slug="")
+            category.save()
+            self.categories[key] = category.id
+            self.name_prefixes[category.id] = category_name_prefix(category.name)
+        return self.categories[key]
+
+    def resolve_brand(self, name):
+        key = name.strip().lower()
+        if key not in self.brands:
+            if not self.create_missing:
+                raise RowError(f"unknown brand {name!r}")
+            brand = Brand(name=name.strip(), slug="")
+            brand.save()
+            self.brands[key] = brand.id
+        return self.brands[key]
+
+    def resolve_attribute(self, name):
+        key = name.strip().lower()
+        if key not in self.attributes:
+            if not self.create_missing:
+                raise RowError(f"unknown attribute {name!r}")
+            self.attributes[key] = Attribute.objects.create(name=name.strip()).id
+        return self.attributes[key]
+
+    # Parsing.
+
+    def read_rows(self, stream, feed_format):
+        if feed_format == "jsonl":
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(stream)
+
+    @staticmethod
+    def parse_attributes(row):
+        attributes = row.get("attributes") or {}
+        if isinstance(attributes, str):
+            attributes = json.loads(attributes)
+        attributes = dict(attributes)
+        for column, value in row.items():
+            if column.startswith(ATTRIBUTE_COLUMN_PREFIX) and value not in (None, ""):
+                attributes[column[len(ATTRIBUTE_COLUMN_PREFIX):]] = value
+        return attributes
+
+    @staticmethod
+    def parse_int(value):
+        if value in (None, ""):
+            return None
+        return int(value)
+
+    def build_good(self, row):
+        try:
+            name = (row["name"] or "").strip()
+            category_id = self.resolve_category(row["category"])
+            brand_id = self.resolve_brand(row["brand"])
+            price = Decimal(str(row.get("price") or 0))
+            sale_percent = self.parse_int(row.get("sale_percent"))
+            quantity = self.parse_int(row.get("quantity"))
+        except KeyError as exc:
+            raise RowError(f"missing column {exc}")
+        except (InvalidOperation, ValueError, AttributeError) as exc:
+            raise RowError(str(exc))
+        if not name:
+            raise RowError("empty name")
+        if sale_percent is not None and not 0 <= sale_percent <= 100:
+            raise RowError(f"sale_percent {sale_percent} is not between 0 and 100")
+
+        # Same naming rule as Good.save(), applied without a per-row category
+        # fetch; final_price is generated by the database.
+        prefix = self.name_prefixes[category_id]
+        if not name.lower().startswith(prefix.lower()):
+            name = f"{prefix} {name}"
+
+        return Good(
+            name=name,
+            slug=row.get("slug") or slugify(name),
+            category_id=category_id,
+            brand_id=brand_id,
+            price=price,
+            sale_percent=sale_percent,
+            quantity=quantity,
+            description=row.get("description") or None,
+        )
+
+    # Writing.
+
+    def import_chunk(self, rows):
+        goods = {}
+        attribute_values = {}
+        skipped = 0
+        for row in rows:
+            try:
+                good = self.build_good(row)
+                attributes = {
+                    self.resolve_attribute(name): str(value)
+                    for name, value in self.parse_attributes(row).items()
+                }
+            except RowError as exc:
+                skipped += 1
+                self.stderr.write(f"Skipping {row.get('slug') or row.get('name')!r}: {exc}")
+                continue
+            # A slug may appear twice in one chunk; the last row wins, as a
+            # single upsert statement cannot touch the same row twice.
+            goods[good.slug] = good
+            attribute_values[good.slug] = attributes
+
+        if not goods:
+            return 0, skipped
+
+        with transaction.atomic():
+            # Goods moved to another category leave its listings too.
+            previous_category_ids = set(
+                Good.objects.filter(slug__in=list(goods)).values_list(
+                    "category_id", flat=True
+                )
+            )
+            saved = Good.objects.bulk_create(
+                goods.values(),
+                update_conflicts=True,
+                unique_fields=["slug"],
+                update_fields=GOOD_UPDATE_FIELDS,
+            )
+            ids = {good.slug: good.pk for good in saved if good.pk}
+            if len(ids) < len(goods):
+                ids.update(
+                    Good.objects.filter(slug__in=list(goods)).values_list("slug", "id")
+                )
+
+            new_links = set()
+            values = []
+            for slug, attributes in attribute_values.items():
+                category_id = goods[slug].category_id
+                for attribute_id, value in attributes.items():
+                    numeric_value, unit = None, ""
+                    if attribute_id in self.numeric_units:
+                        numeric_value, unit = parse_numeric_value(
+                            value, self.numeric_units[attribute_id]
+                        )
+                    values.append(
+                        AttributeValue(
+                            good_id=ids[slug],
+                            attribute_id=attribute_id,
+                            value=value,
+                            numeric_value=numeric_value,
+                            unit=unit,
+                        )
+                    )
+                    if (attribute_id, category_id) not in self.attribute_categories:
+                        new_links.add((attribute_id, category_id))
+            AttributeValue.objects.bulk_create(
+                values,
+                update_conflicts=True,
+                unique_fields=["good", "attribute"],
+                update_fields=["value", "numeric_value", "unit"],
+            )
+            Attribute.categories.through.objects.bulk_create(
+                [
+                    Attribute.categories.through(
+                        attribute_id=attribute_id, category_id=category_id
+                    )
+                    for attribute_id, category_id in new_links
+                ],
+                ignore_conflicts=True,
+            )
+            self.attribute_categories |= new_links
+
+            refresh_search_documents(ids.values())
+        self.changed_slugs.update(ids)
+        self.changed_category_ids |= previous_category_ids
+        self.changed_category_ids.update(good.category_id for good in goods.values())
+        return len(goods), skipped
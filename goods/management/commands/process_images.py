@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from goods.image_queue import (
+    IMAGE_MODELS,
+    claim_images,
+    images_changed,
+    release_images,
+    store_variants,
+)
+from goods.images import render_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the variants and metadata of pending images. Images are "
+        "claimed from the database in batches and decoded and resized in a "
+        "pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when the queue is empty."
+        )
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="Queue failed images again."
+        )
+        parser.add_argument(
+            "--requeue-processing",
+            action="store_true",
+            help="Queue images left processing by a worker that died.",
+        )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Queue ready images that have no placeholder or dominant color.",
+        )
+
+    def handle(self, *args, **options):
+        for model in IMAGE_MODELS:
+            if options["retry_failed"]:
+                model.objects.filter(image_status="failed").update(
+                    image_status="pending"
+                )
+            if options["requeue_processing"]:
+                model.objects.filter(image_status="processing").update(
+                    image_status="pending"
+                )
+            if options["backfill"]:
+                model.objects.filter(image_status="ready", image_placeholder="").update(
+                    image_status="pending"
+                )
+
+        processed = 0
+        # Spawned rather than forked children: they start without this
+        # process's database connections and threads, and only read storage.
+        with ProcessPoolExecutor(
+            max_workers=options["processes"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            while True:
+                close_old_connections()
+                count = sum(
+                    self.process_batch(pool, model, options["batch_size"])
+                    for model in IMAGE_MODELS
+                )
+                processed += count
+                if count:
+                    self.stdout.write(f"Processed {processed} images.")
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(options["poll_interval"])
+        self.stdout.write(self.style.SUCCESS(f"Done: {processed} images processed."))
+
+    def process_batch(self, pool, model, batch_size):
+        rows = claim_images(model, batch_size)
+        if not rows:
+            return 0
+        futures = {
+            pool.submit(render_job, model._meta.label, name): (pk, name)
+            for pk, name in rows
+        }
+        pending = {pk for pk, _ in rows}
+        good_ids = []
+        try:
+            for future in as_completed(futures):
+                pk, name = futures[future]
+                rendered = future.result()
+                if not rendered:
+                    self.stderr.write(f"Cannot render {name}")
+                good_ids.append(store_variants(model, pk, name, rendered))
+                pending.discard(pk)
+        finally:
+            release_images(model, pending)
+            images_changed(good_ids)
+        return len(rows)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from goods.documents import refresh_documents
+from goods.models import Good
+
+
+class Command(BaseCommand):
+    help = "Render the pre-serialized detail and list documents of goods."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--stale-only",
+            action="store_true",
+            help="Skip goods whose document is already current.",
+        )
+
+    def handle(self, *args, **options):
+        goods = Good.objects.all()
+        if options["stale_only"]:
+            goods = goods.exclude(document__good_updated_at=F("updated_at"))
+        refreshed = refresh_documents(goods, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rendered {refreshed} documents."))
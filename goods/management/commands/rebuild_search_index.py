@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from goods.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search document of every good."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        refreshed = refresh_search_documents(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {refreshed} goods."))
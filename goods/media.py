@@ -0,0 +1,158 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from goods.storage import file_fingerprint, is_content_name
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Unversioned URLs may point at different bytes later; revalidate each time.
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """
+    Read-only view of ``length`` bytes of an open file starting at ``start``.
+
+    It has no ``fileno``, so WSGI servers stream it with ``read`` instead of
+    sending the whole file.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` of a single byte range, None when the header
+    should be ignored (missing, malformed or multiple ranges) and
+    ``(size, size)`` when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or size == 0:
+        return size, size
+    return start, end
+
+
+def media_etag(name, stat):
+    if is_content_name(name):
+        # The content hash is already in the name.
+        return quote_etag(posixpath.splitext(posixpath.basename(name))[0])
+    return quote_etag(file_fingerprint(stat))
+
+
+def with_headers(response, headers):
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT with validators and byte ranges.
+
+    Content-addressed names, and legacy names requested with their current
+    ``?v=`` fingerprint, are cached for a year as immutable. With
+    MEDIA_ACCEL_REDIRECT or MEDIA_SENDFILE_HEADER set, only headers are
+    produced and the front server sends the bytes.
+    """
+    name = posixpath.normpath(path).lstrip("/")
+    if posixpath.basename(name).startswith("."):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = media_etag(name, stat)
+    immutable = is_content_name(name) or request.GET.get("v") == file_fingerprint(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        ),
+        "Accept-Ranges": "bytes",
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is not None:
+        return with_headers(response, headers)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT", "")
+    sendfile_header = getattr(settings, "MEDIA_SENDFILE_HEADER", "")
+    if accel_prefix or sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if accel_prefix:
+            response["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{name}"
+        else:
+            response[sendfile_header] = full_path
+        return with_headers(response, headers)
+
+    size = stat.st_size
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if "Range" in request.headers and (if_range is None or if_range == etag):
+        byte_range = parse_range(request.headers["Range"], size)
+    if byte_range == (size, size):
+        response = HttpResponse(status=416, content_type=content_type)
+        response["Content-Range"] = f"bytes */{size}"
+        return with_headers(response, headers)
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+        response["Content-Length"] = size
+    elif byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(open(full_path, "rb"), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return with_headers(response, headers)
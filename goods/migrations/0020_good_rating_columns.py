@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:26
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Good = apps.get_model("goods", "Good")
+    ProductReview = apps.get_model("reviews", "ProductReview")
+    totals = ProductReview.objects.values("product").annotate(
+        rating_sum=Sum("rating"), reviews_count=Count("id"), avg_rating=Avg("rating")
+    )
+    for row in totals.iterator():
+        Good.objects.filter(pk=row["product"]).update(
+            rating_sum=row["rating_sum"],
+            reviews_count=row["reviews_count"],
+            avg_rating=round(row["avg_rating"], 2),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0019_attribute_is_filter"),
+        ("reviews", "0002_alter_productreview_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="good",
+            name="avg_rating",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=3, verbose_name="Average Rating"
+            ),
+        ),
+        migrations.AddField(
+            model_name="good",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, verbose_name="Rating Sum"),
+        ),
+        migrations.AddField(
+            model_name="good",
+            name="reviews_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Reviews Count"),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:30
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+SEARCH_INDEX_NAME = "good_search_document_gin"
+SQLITE_FTS_TABLE = "goods_good_fts"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        Good = apps.get_model("goods", "Good")
+        schema_editor.add_index(
+            Good,
+            GinIndex(
+                SearchVector("search_document", config="simple"),
+                name=SEARCH_INDEX_NAME,
+            ),
+        )
+    elif connection.vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5("
+            "search_document, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {SEARCH_INDEX_NAME}")
+    elif connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}")
+
+
+def populate_search_documents(apps, schema_editor):
+    Good = apps.get_model("goods", "Good")
+    AttributeValue = apps.get_model("goods", "AttributeValue")
+
+    attribute_values = defaultdict(list)
+    for good_id, value in AttributeValue.objects.order_by().values_list(
+        "good_id", "value"
+    ):
+        attribute_values[good_id].append(value)
+
+    documents = []
+    for good in Good.objects.select_related("brand", "category"):
+        parts = [good.name, good.brand.name, good.category.name]
+        good.search_document = " ".join(
+            part for part in parts + attribute_values[good.id] if part
+        )
+        documents.append(good)
+    Good.objects.bulk_update(documents, ["search_document"], batch_size=500)
+
+    if schema_editor.connection.vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, search_document) VALUES (%s, %s)",
+                [(good.id, good.search_document) for good in documents],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0020_good_rating_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="good",
+            name="search_document",
+            field=models.TextField(
+                blank=True, default="", editable=False, verbose_name="Search Document"
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0021_good_search_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="good",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:40
+
+import django.db.models.expressions
+import django.db.models.functions.math
+import django.db.models.lookups
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0022_good_updated_at"),
+    ]
+
+    # A column cannot be altered into a generated one. Dropping and re-adding
+    # it lets the database compute final_price for every existing row.
+    operations = [
+        migrations.RemoveField(
+            model_name="good",
+            name="final_price",
+        ),
+        migrations.AddField(
+            model_name="good",
+            name="final_price",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        django.db.models.lookups.GreaterThan(
+                            models.F("sale_percent"), 0
+                        ),
+                        then=django.db.models.functions.math.Round(
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("price"),
+                                "-",
+                                django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        models.F("price"), "*", models.F("sale_percent")
+                                    ),
+                                    "*",
+                                    models.Value(Decimal("0.01")),
+                                ),
+                            )
+                        ),
+                    ),
+                    default=django.db.models.functions.math.Round(models.F("price")),
+                    output_field=models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                output_field=models.DecimalField(decimal_places=2, max_digits=10),
+                verbose_name="Final Price",
+            ),
+        ),
+    ]
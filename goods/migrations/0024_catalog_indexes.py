@@ -0,0 +1,59 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0023_good_final_price_generated"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attributevalue",
+            index=models.Index(
+                fields=["attribute", "value"], name="attributevalue_value_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="good",
+            index=models.Index(
+                condition=models.Q(("quantity__gt", 0)),
+                fields=["final_price", "id"],
+                name="good_instock_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="good",
+            index=models.Index(
+                condition=models.Q(("quantity__gt", 0)),
+                fields=["category", "final_price", "id"],
+                name="good_instock_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="good",
+            index=models.Index(
+                condition=models.Q(("quantity__gt", 0)),
+                fields=["brand", "final_price", "id"],
+                name="good_instock_brand_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="good",
+            index=models.Index(
+                condition=models.Q(("quantity__gt", 0)),
+                fields=["price"],
+                name="good_instock_base_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="good",
+            index=models.Index(
+                condition=models.Q(("quantity__gt", 0)),
+                fields=["-reviews_count", "-id"],
+                name="good_instock_popularity_idx",
+            ),
+        ),
+    ]
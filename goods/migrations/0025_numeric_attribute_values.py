@@ -0,0 +1,161 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:56
+
+import re
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# Frozen copy of goods.units as of this migration, so later changes to the
+# parsing rules do not change what this backfill did.
+QUANTITY_RE = re.compile(r"^\s*([-+]?\d+(?:[.,]\d+)?)\s*(.*?)\s*$")
+
+UNIT_ALIASES = {
+    '"': "in",
+    "inch": "in",
+    "дюйм": "in",
+    "дюймів": "in",
+    "г": "g",
+    "гр": "g",
+    "кг": "kg",
+    "мм": "mm",
+    "см": "cm",
+    "м": "m",
+    "мб": "mb",
+    "гб": "gb",
+    "тб": "tb",
+    "гц": "hz",
+    "мгц": "mhz",
+    "ггц": "ghz",
+    "вт": "w",
+    "мач": "mah",
+}
+
+CONVERSIONS = {
+    "g": ("g", 1),
+    "kg": ("g", 1000),
+    "mm": ("mm", 1),
+    "cm": ("mm", 10),
+    "m": ("mm", 1000),
+    "mb": ("mb", 1),
+    "gb": ("mb", 1024),
+    "tb": ("mb", 1024 * 1024),
+    "hz": ("hz", 1),
+    "mhz": ("hz", 10**6),
+    "ghz": ("hz", 10**9),
+}
+
+
+def parse_quantity(value):
+    match = QUANTITY_RE.match(value or "")
+    if not match:
+        return None, ""
+    unit = match.group(2).strip().lower().rstrip(".")
+    return Decimal(match.group(1).replace(",", ".")), UNIT_ALIASES.get(unit, unit)
+
+
+def parse_numeric_value(value, target_unit):
+    number, unit = parse_quantity(value)
+    if number is None:
+        return None, ""
+    if unit == target_unit or not target_unit:
+        return number, unit
+    source = CONVERSIONS.get(unit)
+    target = CONVERSIONS.get(target_unit)
+    if source and target and source[0] == target[0]:
+        return number * source[1] / target[1], target_unit
+    return None, unit
+
+
+def backfill_numeric_values(apps, schema_editor):
+    """
+    Flag attributes whose every value parses as a number in convertible
+    units, and store the parsed values in the most common unit.
+    """
+    Attribute = apps.get_model("goods", "Attribute")
+    AttributeValue = apps.get_model("goods", "AttributeValue")
+
+    values_by_attribute = defaultdict(list)
+    for value in AttributeValue.objects.order_by().only("id", "attribute_id", "value"):
+        values_by_attribute[value.attribute_id].append(value)
+
+    for attribute_id, values in values_by_attribute.items():
+        units = Counter()
+        for value in values:
+            number, unit = parse_quantity(value.value)
+            if number is None:
+                break
+            units[unit] += 1
+        else:
+            unit = max(units, key=lambda item: (bool(item), units[item]))
+            parsed = [parse_numeric_value(value.value, unit) for value in values]
+            if any(number is None for number, _ in parsed):
+                continue
+            for value, (number, value_unit) in zip(values, parsed):
+                value.numeric_value, value.unit = number, value_unit
+            AttributeValue.objects.bulk_update(
+                values, ["numeric_value", "unit"], batch_size=1000
+            )
+            Attribute.objects.filter(pk=attribute_id).update(is_numeric=True, unit=unit)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0024_catalog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attribute",
+            name="is_numeric",
+            field=models.BooleanField(
+                default=False,
+                help_text="Parse values as numbers so goods can be filtered by range.",
+                verbose_name="Numeric",
+            ),
+        ),
+        migrations.AddField(
+            model_name="attribute",
+            name="unit",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Unit values are converted to, e.g. gb, kg or in.",
+                max_length=20,
+                verbose_name="Unit",
+            ),
+        ),
+        migrations.AddField(
+            model_name="attributevalue",
+            name="numeric_value",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=6,
+                editable=False,
+                max_digits=20,
+                null=True,
+                verbose_name="Numeric Value",
+            ),
+        ),
+        migrations.AddField(
+            model_name="attributevalue",
+            name="unit",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=20,
+                verbose_name="Unit",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attributevalue",
+            index=models.Index(
+                condition=models.Q(("numeric_value__isnull", False)),
+                fields=["attribute", "numeric_value"],
+                name="attributevalue_numeric_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_numeric_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0025_numeric_attribute_values"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoodDocument",
+            fields=[
+                (
+                    "good",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="document",
+                        serialize=False,
+                        to="goods.good",
+                    ),
+                ),
+                ("detail", models.TextField(verbose_name="Detail JSON")),
+                ("card", models.TextField(verbose_name="List Card JSON")),
+                (
+                    "good_updated_at",
+                    models.DateTimeField(verbose_name="Good Updated At"),
+                ),
+                (
+                    "rendered_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Rendered At"),
+                ),
+            ],
+            options={
+                "verbose_name": "Good Document",
+                "verbose_name_plural": "Good Documents",
+            },
+        ),
+    ]
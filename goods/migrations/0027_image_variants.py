@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+def drop_good_documents(apps, schema_editor):
+    # Documents predate the image_variants key; goods fall back to live
+    # rendering until rebuild_good_documents or their next change.
+    apps.get_model("goods", "GoodDocument").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0026_good_documents"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="good",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, verbose_name="Image Variants"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True, default=dict, editable=False, verbose_name="Image Variants"
+            ),
+        ),
+        migrations.RunPython(drop_good_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+def set_image_status(apps, schema_editor):
+    # Images without variants are queued for the process_images worker.
+    for model_name in ("Good", "ProductImage"):
+        model = apps.get_model("goods", model_name)
+        images = model.objects.exclude(image="").exclude(image__isnull=True)
+        images.exclude(image_variants={}).update(image_status="ready")
+        images.filter(image_variants={}).update(image_status="pending")
+    # The payload gained image_status.
+    apps.get_model("goods", "GoodDocument").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0027_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="good",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("none", "No image"),
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="none",
+                editable=False,
+                max_length=20,
+                verbose_name="Image Status",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("none", "No image"),
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="none",
+                editable=False,
+                max_length=20,
+                verbose_name="Image Status",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="good",
+            index=models.Index(
+                condition=models.Q(("image_status", "pending")),
+                fields=["id"],
+                name="good_image_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productimage",
+            index=models.Index(
+                condition=models.Q(("image_status", "pending")),
+                fields=["id"],
+                name="productimage_pending_idx",
+            ),
+        ),
+        migrations.RunPython(set_image_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:19
+
+import goods.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0028_image_processing_queue"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="good",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=goods.storage.get_image_storage,
+                upload_to="goods/",
+                verbose_name="Image",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="productimage",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=goods.storage.get_image_storage,
+                upload_to="goods/",
+                verbose_name="Image",
+            ),
+        ),
+    ]
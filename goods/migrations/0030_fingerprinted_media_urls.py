@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def drop_good_documents(apps, schema_editor):
+    # Stored documents carry unversioned URLs for images saved before content
+    # addressing; goods fall back to live rendering until they are rebuilt.
+    apps.get_model("goods", "GoodDocument").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0029_content_addressed_images"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_good_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+def drop_good_documents(apps, schema_editor):
+    # The payload gained the image metadata fields. Existing images get their
+    # metadata from process_images --backfill.
+    apps.get_model("goods", "GoodDocument").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0030_fingerprinted_media_urls"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="good",
+            name="image_color",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=7,
+                verbose_name="Image Color",
+            ),
+        ),
+        migrations.AddField(
+            model_name="good",
+            name="image_height",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Image Height"
+            ),
+        ),
+        migrations.AddField(
+            model_name="good",
+            name="image_placeholder",
+            field=models.TextField(
+                blank=True, default="", editable=False, verbose_name="Image Placeholder"
+            ),
+        ),
+        migrations.AddField(
+            model_name="good",
+            name="image_width",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Image Width"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_color",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=7,
+                verbose_name="Image Color",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_height",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Image Height"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_placeholder",
+            field=models.TextField(
+                blank=True, default="", editable=False, verbose_name="Image Placeholder"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_width",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Image Width"
+            ),
+        ),
+        migrations.RunPython(drop_good_documents, migrations.RunPython.noop),
+    ]
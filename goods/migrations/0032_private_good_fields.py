@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def drop_good_documents(apps, schema_editor):
+    # Stored documents still carry search_document, rating_sum and updated_at;
+    # goods fall back to live rendering until they are rebuilt.
+    apps.get_model("goods", "GoodDocument").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0031_image_metadata"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_good_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def drop_good_documents(apps, schema_editor):
+    # Stored documents render final_price as a number rather than a decimal
+    # string; goods fall back to live rendering until they are rebuilt.
+    apps.get_model("goods", "GoodDocument").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0032_private_good_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_good_documents, migrations.RunPython.noop),
+    ]
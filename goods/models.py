@@ -2,11 +2,56 @@ from decimal import Decimal, ROUND_HALF_UP
 
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Round
+from django.db.models.lookups import GreaterThan
 from django.utils.text import slugify
 import inflect
 
+from goods.storage import get_image_storage
+from goods.units import parse_numeric_value
+
 inflector = inflect.engine()
 
+IMAGE_STATUS_CHOICES = [
+    ("none", "No image"),
+    ("pending", "Pending"),
+    ("processing", "Processing"),
+    ("ready", "Ready"),
+    ("failed", "Failed"),
+]
+
+
+def category_name_prefix(category_name):
+    """
+    Singular, title-cased category name that good names are prefixed with.
+    """
+    singular_category_name = inflector.singular_noun(category_name) or category_name
+    return singular_category_name.title()
+
+
+PERCENT = Value(Decimal("0.01"))
+
+
+def final_price_expression(price=F("price"), sale_percent=F("sale_percent")):
+    """
+    SQL counterpart of ``Good.calculate_final_price``, generating the stored
+    ``Good.final_price`` column.
+
+    ROUND() on numeric rounds halves away from zero, which matches
+    ROUND_HALF_UP for the non-negative prices stored here. Percentages are
+    scaled by multiplying with 0.01, as SQLite would truncate an integer
+    division.
+    """
+    return Case(
+        When(
+            GreaterThan(sale_percent, 0),
+            then=Round(price - price * sale_percent * PERCENT),
+        ),
+        default=Round(price),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+    )
+
 
 class Group(models.Model):
     name = models.CharField(
@@ -119,41 +164,79 @@ class Good(models.Model):
     )
     description = models.TextField(null=True, blank=True, verbose_name="Description")
     image = models.ImageField(
-        upload_to="goods/", null=True, blank=True, verbose_name="Image"
+        upload_to="goods/",
+        storage=get_image_storage,
+        null=True,
+        blank=True,
+        verbose_name="Image",
+    )
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False, verbose_name="Image Variants"
+    )
+    image_status = models.CharField(
+        max_length=20,
+        choices=IMAGE_STATUS_CHOICES,
+        default="none",
+        editable=False,
+        verbose_name="Image Status",
+    )
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name="Image Width"
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name="Image Height"
+    )
+    image_color = models.CharField(
+        max_length=7, blank=True, default="", editable=False, verbose_name="Image Color"
+    )
+    image_placeholder = models.TextField(
+        blank=True, default="", editable=False, verbose_name="Image Placeholder"
     )
     quantity = models.PositiveIntegerField(null=True)
-    final_price = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
+    final_price = models.GeneratedField(
+        expression=final_price_expression(),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
         verbose_name="Final Price",
-        null=True,
-        blank=True,
     )
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Rating Sum")
+    reviews_count = models.PositiveIntegerField(
+        default=0, verbose_name="Reviews Count"
+    )
+    avg_rating = models.DecimalField(
+        max_digits=3, decimal_places=2, default=0, verbose_name="Average Rating"
+    )
+    search_document = models.TextField(
+        blank=True, default="", editable=False, verbose_name="Search Document"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
 
     def calculate_final_price(self):
+        """
+        Preview of ``final_price`` for unsaved values; the stored column is
+        generated by the database from ``final_price_expression``.
+        """
         if self.sale_percent:
             discount = Decimal(self.sale_percent) / Decimal(100) * self.price
             # Calculate final price and round to the nearest whole number
-            self.final_price = (self.price - discount).quantize(
+            return (self.price - discount).quantize(
                 Decimal("1"), rounding=ROUND_HALF_UP
             )
-        else:
-            self.final_price = self.price.quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+        return self.price.quantize(Decimal("1"), rounding=ROUND_HALF_UP)
 
     def save(self, *args, **kwargs):
-        singular_category_name = (
-            inflector.singular_noun(self.category.name) or self.category.name
-        )
-        category_name_title = singular_category_name.title()
+        category_name_title = category_name_prefix(self.category.name)
         if not self.name.lower().startswith(category_name_title.lower()):
             self.name = f"{category_name_title} {self.name}"
 
-        # Call the method to calculate final price
-        self.calculate_final_price()
-
         if not self.slug:
             self.slug = slugify(self.name)
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if not adding:
+            # INSERT returns the generated column but UPDATE does not; defer
+            # it so the next access reloads the value the database computed.
+            self.__dict__.pop("final_price", None)
 
     def __str__(self):
         return f"{self.name}, {self.category}, {self.brand}"
@@ -161,6 +244,41 @@ class Good(models.Model):
     class Meta:
         verbose_name = "Good"
         verbose_name_plural = "Goods"
+        # Listings only show goods in stock, so the sort indexes are partial
+        # and skip sold-out rows entirely.
+        indexes = [
+            models.Index(
+                fields=["final_price", "id"],
+                condition=models.Q(quantity__gt=0),
+                name="good_instock_price_idx",
+            ),
+            models.Index(
+                fields=["category", "final_price", "id"],
+                condition=models.Q(quantity__gt=0),
+                name="good_instock_category_idx",
+            ),
+            models.Index(
+                fields=["brand", "final_price", "id"],
+                condition=models.Q(quantity__gt=0),
+                name="good_instock_brand_idx",
+            ),
+            models.Index(
+                fields=["price"],
+                condition=models.Q(quantity__gt=0),
+                name="good_instock_base_price_idx",
+            ),
+            models.Index(
+                fields=["-reviews_count", "-id"],
+                condition=models.Q(quantity__gt=0),
+                name="good_instock_popularity_idx",
+            ),
+            # The image worker polls for pending rows.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(image_status="pending"),
+                name="good_image_pending_idx",
+            ),
+        ]
 
 
 class AttributeGroup(models.Model):
@@ -201,12 +319,40 @@ class Attribute(models.Model):
         Category, related_name="attributes", verbose_name="Categories"
     )
     order = models.PositiveIntegerField(default=0, verbose_name="Display Order")
+    is_numeric = models.BooleanField(
+        default=False,
+        verbose_name="Numeric",
+        help_text="Parse values as numbers so goods can be filtered by range.",
+    )
+    unit = models.CharField(
+        max_length=20,
+        blank=True,
+        default="",
+        verbose_name="Unit",
+        help_text="Unit values are converted to, e.g. gb, kg or in.",
+    )
 
     def __str__(self):
         if self.group:
             return f"{self.group.name} - {self.name}"
         return self.name
 
+    def parse_value(self, value):
+        if not self.is_numeric:
+            return None, ""
+        return parse_numeric_value(value, self.unit)
+
+    def refresh_numeric_values(self, batch_size=1000):
+        """
+        Re-parse the stored values after ``is_numeric`` or ``unit`` changed.
+        """
+        values = list(self.attribute_values.order_by().only("id", "value"))
+        for value in values:
+            value.numeric_value, value.unit = self.parse_value(value.value)
+        AttributeValue.objects.bulk_update(
+            values, ["numeric_value", "unit"], batch_size=batch_size
+        )
+
     class Meta:
         verbose_name = "Attribute"
         verbose_name_plural = "Attributes"
@@ -232,28 +378,111 @@ class AttributeValue(models.Model):
         verbose_name="Attribute",
     )
     value = models.CharField(max_length=255, verbose_name="Value")
+    numeric_value = models.DecimalField(
+        max_digits=20,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Numeric Value",
+    )
+    unit = models.CharField(
+        max_length=20, blank=True, default="", editable=False, verbose_name="Unit"
+    )
 
     def __str__(self):
         return f"{self.attribute.name}: {self.value} ({self.good.name})"
 
+    def save(self, *args, **kwargs):
+        self.numeric_value, self.unit = self.attribute.parse_value(self.value)
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Attribute Value"
         verbose_name_plural = "Attribute Values"
         unique_together = ("good", "attribute")
         ordering = ["attribute__group__order", "attribute__order"]
+        indexes = [
+            models.Index(
+                fields=["attribute", "value"], name="attributevalue_value_idx"
+            ),
+            models.Index(
+                fields=["attribute", "numeric_value"],
+                condition=models.Q(numeric_value__isnull=False),
+                name="attributevalue_numeric_idx",
+            ),
+        ]
 
 
 class ProductImage(models.Model):
     good = models.ForeignKey(Good, related_name="images", null=True, on_delete=models.CASCADE)
     image = models.ImageField(
-        upload_to="goods/", null=True, blank=True, verbose_name="Image"
+        upload_to="goods/",
+        storage=get_image_storage,
+        null=True,
+        blank=True,
+        verbose_name="Image",
+    )
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False, verbose_name="Image Variants"
+    )
+    image_status = models.CharField(
+        max_length=20,
+        choices=IMAGE_STATUS_CHOICES,
+        default="none",
+        editable=False,
+        verbose_name="Image Status",
+    )
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name="Image Width"
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name="Image Height"
+    )
+    image_color = models.CharField(
+        max_length=7, blank=True, default="", editable=False, verbose_name="Image Color"
+    )
+    image_placeholder = models.TextField(
+        blank=True, default="", editable=False, verbose_name="Image Placeholder"
     )
     description = models.TextField(max_length=100, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(image_status="pending"),
+                name="productimage_pending_idx",
+            ),
+        ]
+
     def __str__(self):
         if self.image:
             return self.image.name
         elif self.good:
             return f"Image for {self.good.name}"
-        return "Unnamed Image"
\ No newline at end of file
+        return "Unnamed Image"
+
+class GoodDocument(models.Model):
+    """
+    Pre-rendered JSON of a good, served instead of serializing it per request.
+
+    A document is only valid for the ``updated_at`` it was rendered from;
+    ``good_updated_at`` records that value so stale documents are never served.
+    """
+
+    good = models.OneToOneField(
+        Good, primary_key=True, related_name="document", on_delete=models.CASCADE
+    )
+    detail = models.TextField(verbose_name="Detail JSON")
+    card = models.TextField(verbose_name="List Card JSON")
+    good_updated_at = models.DateTimeField(verbose_name="Good Updated At")
+    rendered_at = models.DateTimeField(auto_now=True, verbose_name="Rendered At")
+
+    class Meta:
+        verbose_name = "Good Document"
+        verbose_name_plural = "Good Documents"
+
+    def __str__(self):
+        return f"Document for good {self.good_id}"
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from goods.models import Category
+from goods.response_cache import NAVIGATION_TAG, invalidate_tags
+from goods.serializers import CategorySerializer, CategoryForGroupSerializer
+
+NAVIGATION_CACHE_KEY = "goods:navigation"
+
+
+def build_navigation():
+    """
+    Render the group -> category menu with goods counts as plain data.
+
+    Only categories that contain goods are listed, matching what
+    GroupViewSet and CategoryViewSet used to compute per request.
+    """
+    categories = (
+        Category.objects.select_related("group")
+        .prefetch_related("attributes")
+        .annotate(
+            goods_count=Count("goods"),
+            in_stock_count=Count("goods", filter=Q(goods__quantity__gt=0)),
+        )
+        .filter(goods_count__gt=0)
+        .order_by("group_id", "id")
+    )
+
+    groups = {}
+    category_items = []
+    for category in categories:
+        counts = {
+            "goods_count": category.goods_count,
+            "in_stock_count": category.in_stock_count,
+        }
+        category_items.append({**CategorySerializer(category).data, **counts})
+
+        group = category.group
+        if group.id not in groups:
+            groups[group.id] = {
+                "id": group.id,
+                "name": group.name,
+                "slug": group.slug,
+                "categories": [],
+            }
+        groups[group.id]["categories"].append(
+            {**CategoryForGroupSerializer(category).data, **counts}
+        )
+
+    category_items.sort(key=lambda item: item["id"])
+    return {"groups": list(groups.values()), "categories": category_items}
+
+
+def get_navigation():
+    navigation = cache.get(NAVIGATION_CACHE_KEY)
+    if navigation is None:
+        navigation = build_navigation()
+        cache.set(NAVIGATION_CACHE_KEY, navigation, timeout=None)
+    return navigation
+
+
+def invalidate_navigation():
+    cache.delete(NAVIGATION_CACHE_KEY)
+    invalidate_tags(NAVIGATION_TAG)
@@ -0,0 +1,224 @@
+import json
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Expression, F, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+from rest_framework.utils.urls import replace_query_param
+
+
+class CustomPagination(PageNumberPagination):
+    page_size = 25
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+
+class RowAfter(Expression):
+    """
+    ``(a, b, ...) > (x, y, ...)``, or ``<`` for a descending key.
+
+    A row-value comparison is answered by a single range scan of an index on
+    the same columns, however many rows share the leading value.
+    """
+
+    output_field = BooleanField()
+    conditional = True
+
+    def __init__(self, fields, values, descending):
+        super().__init__()
+        self.fields = [F(field) for field in fields]
+        self.values = list(values)
+        self.descending = descending
+
+    def get_source_expressions(self):
+        return [*self.fields, *self.values]
+
+    def set_source_expressions(self, exprs):
+        self.fields, self.values = exprs[: len(self.fields)], exprs[len(self.fields) :]
+
+    def as_sql(self, compiler, connection):
+        columns, values, params = [], [], []
+        for expressions, parts in ((self.fields, columns), (self.values, values)):
+            for expression in expressions:
+                sql, sql_params = compiler.compile(expression)
+                parts.append(sql)
+                params.extend(sql_params)
+        operator = "<" if self.descending else ">"
+        return f"({', '.join(columns)}) {operator} ({', '.join(values)})", params
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    CursorPagination whose cursor holds every ordering value, not just the
+    first one.
+
+    DRF positions its cursor on the first ordering field and skips rows tied
+    on it with an OFFSET, so long runs of equal prices or review counts make
+    deep pages scan and discard them. Orderings here end with a unique field,
+    so the full key identifies a row, each page starts right after it and
+    the offset is always zero.
+    """
+
+    page_size = 25
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor else None
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.after_position(queryset.model, ordering, current_position)
+            )
+
+        # One extra row tells whether another page follows.
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after_position(self, model, ordering, position):
+        """
+        Condition selecting the rows after ``position`` in ``ordering``.
+        """
+        names = [field.lstrip("-") for field in ordering]
+        if len(position) != len(names):
+            raise NotFound(self.invalid_cursor_message)
+        values = []
+        for name, value in zip(names, position):
+            field = model._meta.get_field(name)
+            # Generated columns compare as their output field.
+            field = getattr(field, "output_field", None) or field
+            try:
+                values.append(Value(field.to_python(value), output_field=field))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        descending = {field.startswith("-") for field in ordering}
+        if len(descending) == 1:
+            return RowAfter(names, values, descending.pop())
+        # Mixed directions cannot be one row comparison:
+        # a > x OR (a = x AND (b > y OR (b = y AND ...))).
+        condition = None
+        for field, name, value in reversed(list(zip(ordering, names, values))):
+            lookup = "lt" if field.startswith("-") else "gt"
+            after = Q(**{f"{name}__{lookup}": value})
+            condition = (
+                after if condition is None else after | Q(**{name: value}) & condition
+            )
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[-1], self.ordering)
+            if self.page
+            else self.next_position
+        )
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[0], self.ordering)
+            if self.page
+            else self.previous_position
+        )
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            position = json.loads(tokens["p"][0])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or not all(
+            isinstance(value, str) for value in position
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {"p": json.dumps(cursor.position, separators=(",", ":"))}
+        if cursor.reverse:
+            tokens["r"] = "1"
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [field.lstrip("-") for field in ordering]
+        if isinstance(instance, dict):
+            return [str(instance[name]) for name in names]
+        return [str(getattr(instance, name)) for name in names]
+
+
+class CatalogCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination for the goods catalog.
+
+    The cursor follows the active ``sort`` parameter and always ends with the
+    primary key, so rows with equal prices or review counts keep a stable order
+    and no COUNT(*) is issued.
+    """
+
+    ordering = ("id",)
+    sort_orderings = {
+        "price_asc": ("final_price", "id"),
+        "price_desc": ("-final_price", "-id"),
+        "popularity": ("-reviews_count", "-id"),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        sorting = request.query_params.get("sort")
+        if sorting:
+            return self.sort_orderings.get(sorting, self.sort_orderings["price_asc"])
+        return self.ordering
+
+
+class OrderCursorPagination(KeysetCursorPagination):
+    ordering = ("-created_at", "-id")
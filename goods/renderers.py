@@ -0,0 +1,80 @@
+import math
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    orjson writes str, int, float, dict, list, UUID and datetime values
+    itself. Anything else, such as Decimal or lazy strings, goes through
+    DRF's encoder, so the output is the compact UTF-8 JSON of the stock
+    renderer. Indented output for the browsable API, ASCII-only settings and
+    values orjson rejects (integers past 64 bits) use the stdlib path.
+
+    STRICT_JSON is honoured for values passing through DRF's encoder: a
+    Decimal NaN or infinity falls back to the stock renderer, which raises.
+    Native float NaN and infinity never reach that hook and are written as
+    null; models here store no floats, and checking every payload would cost
+    more than orjson saves.
+    """
+
+    encoder = JSONEncoder()
+
+    def default(self, value):
+        value = self.encoder.default(value)
+        if self.strict and isinstance(value, float) and not math.isfinite(value):
+            raise TypeError("Out of range float values are not JSON compliant")
+        return value
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data, default=self.default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as the stock renderer: these are valid JSON but end
+        # lines in JavaScript.
+        return content.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes UTF-8 bodies with orjson when it is installed.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,170 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from goods.models import Good
+
+TAG_KEY_PREFIX = "response-tag:"
+ENTRY_KEY_PREFIX = "response:"
+
+CATALOG_TAG = "catalog"
+NAVIGATION_TAG = "navigation"
+GOODS_LIST_TAG = "goods:list"
+GOODS_DETAIL_TAG = "goods:detail"
+
+
+def get_response_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def good_tag(slug):
+    return f"good:{slug}"
+
+
+def category_tag(category_id):
+    return f"goods:category:{category_id}"
+
+
+def get_tag_versions(tags):
+    """
+    Return the current token of every tag, creating missing ones.
+    """
+    cache = get_response_cache()
+    keys = {f"{TAG_KEY_PREFIX}{tag}": tag for tag in tags}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        found[key] = cache.get(key)
+    return {keys[key]: token for key, token in found.items()}
+
+
+def invalidate_tags(*tags):
+    """
+    Evict every cached response stored under any of ``tags``.
+    """
+    get_response_cache().set_many(
+        {f"{TAG_KEY_PREFIX}{tag}": uuid.uuid4().hex for tag in tags}, timeout=None
+    )
+
+
+def invalidate_good(good_id=None, slug=None, category_ids=()):
+    """
+    Evict the detail page of a good and every listing that can contain it.
+    """
+    if good_id is not None and slug is None:
+        row = Good.objects.filter(pk=good_id).values_list("slug", "category_id").first()
+        if row:
+            slug, category_id = row
+            category_ids = {*category_ids, category_id}
+    tags = [GOODS_LIST_TAG, *(category_tag(category_id) for category_id in category_ids)]
+    if slug:
+        tags.append(good_tag(slug))
+    invalidate_tags(*tags)
+
+
+def build_cache_key(request):
+    """
+    Key a request by origin, path, sorted query parameters and negotiated
+    format. Bodies hold absolute media and pagination URLs built from the
+    request, so each scheme and host gets its own entry.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = "|".join(
+        [
+            request.scheme,
+            request.get_host(),
+            request.path,
+            "&".join(f"{key}={value}" for key, value in params),
+            request.META.get("HTTP_ACCEPT", ""),
+        ]
+    )
+    return f"{ENTRY_KEY_PREFIX}{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+class CachedResponse(Exception):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class CachedResponseMixin:
+    """
+    Shared cache of rendered responses for anonymous GET requests.
+
+    Each entry remembers the tokens of its tags when it was computed; a model
+    change replaces the tokens of the tags it affects, so only entries that
+    can contain the changed object stop matching.
+    """
+
+    response_cache_actions = ("list", "retrieve")
+    response_cache_tags = (CATALOG_TAG,)
+
+    def get_response_cache_tags(self, request):
+        return list(self.response_cache_tags)
+
+    def is_response_cacheable(self, request):
+        return (
+            request.method == "GET"
+            and self.action in self.response_cache_actions
+            and not request.user.is_authenticated
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_state = None
+        if not self.is_response_cacheable(request):
+            return
+
+        cache = get_response_cache()
+        key = build_cache_key(request)
+        tag_versions = get_tag_versions(self.get_response_cache_tags(request))
+        entry = cache.get(key)
+        if entry is not None and entry["tags"] == tag_versions:
+            response = HttpResponse(
+                entry["content"],
+                status=entry["status"],
+                content_type=entry["content_type"],
+            )
+            response["X-Cache"] = "HIT"
+            raise CachedResponse(response)
+        # Tags are read before the response is computed, so a change that
+        # lands mid-request leaves the stored entry already outdated.
+        self._response_cache_state = (key, tag_versions)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, CachedResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        state = getattr(self, "_response_cache_state", None)
+        if state is None or response.status_code != 200 or response.streaming:
+            return response
+
+        key, tag_versions = state
+
+        def store(rendered_response):
+            get_response_cache().set(
+                key,
+                {
+                    "tags": tag_versions,
+                    "content": rendered_response.content,
+                    "status": rendered_response.status_code,
+                    "content_type": rendered_response["Content-Type"],
+                },
+            )
+
+        response["X-Cache"] = "MISS"
+        if getattr(response, "is_rendered", True):
+            store(response)
+        else:
+            response.add_post_render_callback(store)
+        return response
@@ -0,0 +1,178 @@
+import re
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from goods.models import Good, AttributeValue
+
+SEARCH_CONFIG = "simple"
+SQLITE_FTS_TABLE = "goods_good_fts"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(value):
+    return TOKEN_RE.findall(value.lower())
+
+
+def build_search_document(name, brand_name, category_name, attribute_values):
+    parts = [name, brand_name, category_name, *attribute_values]
+    return " ".join(part for part in parts if part)
+
+
+class PostgresSearchBackend:
+    """
+    tsvector search over ``Good.search_document`` backed by a GIN index.
+    """
+
+    def search(self, queryset, tokens):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector("search_document", config=SEARCH_CONFIG)
+        query = SearchQuery(
+            " & ".join(f"{token}:*" for token in tokens),
+            config=SEARCH_CONFIG,
+            search_type="raw",
+        )
+        return (
+            queryset.alias(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(vector, query))
+        )
+
+    def index(self, documents):
+        pass
+
+    def remove(self, good_ids):
+        pass
+
+
+class SqliteSearchBackend:
+    """
+    FTS5 table keyed by good id, kept in sync from Python for local development.
+    """
+
+    def match_expression(self, tokens):
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset, tokens):
+        match = self.match_expression(tokens)
+        table = Good._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s",
+                [match],
+            )
+        ).annotate(
+            # bm25() is lower-is-better; negate it so ranks sort like Postgres.
+            search_rank=RawSQL(
+                f"SELECT -bm25({SQLITE_FTS_TABLE}) FROM {SQLITE_FTS_TABLE} "
+                f"WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                [match],
+            )
+        )
+
+    def index(self, documents):
+        if not documents:
+            return
+        self.remove(list(documents))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, search_document) VALUES (%s, %s)",
+                list(documents.items()),
+            )
+
+    def remove(self, good_ids):
+        if not good_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(good_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid IN ({placeholders})",
+                list(good_ids),
+            )
+
+
+class FallbackSearchBackend:
+    """
+    Substring match on the search document for databases without full-text support.
+    """
+
+    def search(self, queryset, tokens):
+        condition = Q()
+        for token in tokens:
+            condition &= Q(search_document__icontains=token)
+        return queryset.filter(condition)
+
+    def index(self, documents):
+        pass
+
+    def remove(self, good_ids):
+        pass
+
+
+def get_search_backend():
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if connection.vendor == "sqlite":
+        return SqliteSearchBackend()
+    return FallbackSearchBackend()
+
+
+def search_goods(queryset, value):
+    """
+    Filter ``queryset`` to goods matching every word prefix of ``value``.
+
+    Matching goods are annotated with ``search_rank`` (higher is better).
+    """
+    tokens = tokenize(value)
+    if not tokens:
+        return queryset
+    return get_search_backend().search(queryset, tokens)
+
+
+def refresh_search_documents(good_ids=None, batch_size=1000):
+    """
+    Rebuild the search document of the given goods, or of every good.
+    """
+    goods = Good.objects.order_by("id").values_list(
+        "id", "name", "brand__name", "category__name"
+    )
+    if good_ids is not None:
+        goods = goods.filter(id__in=list(good_ids))
+
+    backend = get_search_backend()
+    refreshed = 0
+    last_id = 0
+    while batch := list(goods.filter(id__gt=last_id)[:batch_size]):
+        ids = [row[0] for row in batch]
+        last_id = ids[-1]
+        attribute_values = defaultdict(list)
+        for good_id, value in (
+            AttributeValue.objects.filter(good_id__in=ids)
+            .order_by()
+            .values_list("good_id", "value")
+        ):
+            attribute_values[good_id].append(value)
+
+        documents = {
+            good_id: build_search_document(
+                name, brand_name, category_name, attribute_values[good_id]
+            )
+            for good_id, name, brand_name, category_name in batch
+        }
+        Good.objects.bulk_update(
+            [
+                Good(id=good_id, search_document=document)
+                for good_id, document in documents.items()
+            ],
+            ["search_document"],
+        )
+        backend.index(documents)
+        refreshed += len(documents)
+    return refreshed
+
+
+def remove_search_documents(good_ids):
+    get_search_backend().remove(list(good_ids))
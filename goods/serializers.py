@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from django.db.models import Count
+from django.db.models import Count, Exists, OuterRef
 from rest_framework import serializers
 from goods.models import (
     Good,
@@ -11,18 +11,47 @@ from goods.models import (
     AttributeValue,
     AttributeGroup, ProductImage,
 )
+from goods.images import variant_urls
 from reviews.serializers import ProductReviewSerializer
 
+
+class ImageVariantsField(serializers.Field):
+    """
+    URLs and sizes of the WebP derivatives of an object's ``image``.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.update(source="*", read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return variant_urls(
+            instance.image, instance.image_variants, self.context.get("request")
+        )
+
+
 class ProductImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = ProductImage
-        fields = ["id", "image", "description", "uploaded_at"]
+        fields = [
+            "id",
+            "image",
+            "image_variants",
+            "image_status",
+            "image_width",
+            "image_height",
+            "image_color",
+            "image_placeholder",
+            "description",
+            "uploaded_at",
+        ]
 
 class AttributeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attribute
-        fields = ["id", "name", "slug", "order"]
+        fields = ["id", "name", "slug", "order", "is_numeric", "unit"]
 
 
 class AttributeGroupSerializer(serializers.ModelSerializer):
@@ -39,7 +68,7 @@ class AttributeValueSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = AttributeValue
-        fields = ["id", "attribute", "value", "group"]
+        fields = ["id", "attribute", "value", "numeric_value", "unit", "group"]
 
     def get_group(self, obj):
         if obj.attribute.group:
@@ -57,30 +86,30 @@ class GoodSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True)
     category_id = serializers.IntegerField(source="category.id", read_only=True)
     brand_name = serializers.CharField(source="brand.name", read_only=True)
-    final_rating = serializers.SerializerMethodField()
-    reviews_count = serializers.SerializerMethodField()
+    # A GeneratedField would map to a bare ModelField and render as a float.
+    final_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+    final_rating = serializers.DecimalField(
+        source="avg_rating",
+        max_digits=3,
+        decimal_places=2,
+        coerce_to_string=False,
+        read_only=True,
+    )
     reviews = serializers.SerializerMethodField()  # Change to SerializerMethodField
     groups = serializers.SerializerMethodField()
     images = ProductImageSerializer(many=True)
-    def get_final_rating(self, obj):
-        # Calculate average rating for the product
-        reviews = obj.reviews.all()
-        if reviews.exists():
-            average_rating = sum(review.rating for review in reviews) / reviews.count()
-            return round(
-                average_rating, 2
-            )  # Return the average rating rounded to two decimal places
-        return 0  # Return 0 if there are no reviews
+    image_variants = ImageVariantsField()
 
     def get_groups(self, obj):
         attribute_groups = AttributeGroup.objects.filter(
-            attributes__attribute_values__good=obj
-        ).distinct()
+            Exists(
+                AttributeValue.objects.filter(good=obj, attribute__group=OuterRef("pk"))
+            )
+        )
         return AttributeGroupSerializer(attribute_groups, many=True).data
 
-    def get_reviews_count(self, obj):
-        return obj.reviews.count()
-
     def get_reviews(self, obj):
         # Get reviews related to the good and serialize them
         reviews = obj.reviews.all()  # Assuming you have a related name 'reviews'
@@ -88,11 +117,116 @@ class GoodSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Good
-        read_only_fields = ["slug"]
-        fields = "__all__"
+        read_only_fields = ["slug", "reviews_count"]
+        # Listed explicitly so bookkeeping columns (rating_sum, avg_rating
+        # behind final_rating, search_document, updated_at) stay private.
+        fields = [
+            "id",
+            "name",
+            "slug",
+            "category",
+            "brand",
+            "price",
+            "sale_percent",
+            "final_price",
+            "description",
+            "quantity",
+            "image",
+            "image_variants",
+            "image_status",
+            "image_width",
+            "image_height",
+            "image_color",
+            "image_placeholder",
+            "images",
+            "attribute_values",
+            "group",
+            "groups",
+            "category_name",
+            "category_id",
+            "brand_name",
+            "final_rating",
+            "reviews_count",
+            "reviews",
+        ]
+
+
+class GoodListSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source="category.name", read_only=True)
+    brand_name = serializers.CharField(source="brand.name", read_only=True)
+    in_stock = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
+    final_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+    final_rating = serializers.DecimalField(
+        source="avg_rating",
+        max_digits=3,
+        decimal_places=2,
+        coerce_to_string=False,
+        read_only=True,
+    )
+
+    def get_in_stock(self, obj):
+        return bool(obj.quantity)
+
+    class Meta:
+        model = Good
+        fields = [
+            "id",
+            "slug",
+            "name",
+            "price",
+            "final_price",
+            "sale_percent",
+            "in_stock",
+            "image",
+            "image_variants",
+            "image_status",
+            "image_width",
+            "image_height",
+            "image_color",
+            "image_placeholder",
+            "brand_name",
+            "category_name",
+            "final_rating",
+            "reviews_count",
+        ]
+        read_only_fields = fields
+
+
+class RepriceSerializer(serializers.Serializer):
+    category = serializers.CharField(required=False)
+    brand = serializers.CharField(required=False)
+    group = serializers.CharField(required=False)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False
+    )
+    sale_percent = serializers.IntegerField(
+        min_value=0, max_value=100, required=False
+    )
+    price_percent = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=Decimal("-99"), required=False
+    )
+
+    filter_fields = ("category", "brand", "group", "ids")
+
+    def validate(self, attrs):
+        if not any(name in attrs for name in self.filter_fields):
+            raise serializers.ValidationError(
+                "Pass at least one of category, brand, group or ids."
+            )
+        if "sale_percent" not in attrs and "price_percent" not in attrs:
+            raise serializers.ValidationError(
+                "Pass sale_percent, price_percent or both."
+            )
+        return attrs
 
 
 class GoodForOrderItemSerializer(serializers.ModelSerializer):
+    final_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = Good
@@ -0,0 +1,416 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (
+    post_init,
+    post_save,
+    post_delete,
+    pre_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from goods.attribute_filters import attribute_filter_registry
+from goods.attribute_index import attribute_index
+from goods.conditional import CATALOG_VERSION, GOODS_VERSION
+from goods.documents import document_queue
+from goods.facets import facet_index
+from goods.images import delete_variants, pending_image_fields, refresh_variants
+from goods.models import (
+    Good,
+    Category,
+    Brand,
+    Group,
+    Attribute,
+    AttributeGroup,
+    AttributeValue,
+    ProductImage,
+)
+from goods.navigation import invalidate_navigation
+from goods.response_cache import CATALOG_TAG, invalidate_good, invalidate_tags
+from goods.search import refresh_search_documents, remove_search_documents
+from goods.suggest import suggest_index
+from goods.versions import bump_version
+
+SEARCH_DOCUMENT_FIELDS = {"name", "brand", "category"}
+
+
+def loaded_values(instance, *names):
+    """
+    Values of ``names`` without loading deferred fields, which would recurse
+    back into post_init. Deferred fields read as None, so a later comparison
+    errs towards invalidating.
+    """
+    return tuple(instance.__dict__.get(name) for name in names)
+
+
+@receiver([post_save, post_delete], sender=Attribute)
+def invalidate_attribute_filters(sender, **kwargs):
+    # After commit, or another worker could rebuild from the old attributes
+    # and keep that registry under the new version.
+    transaction.on_commit(attribute_filter_registry.invalidate)
+
+
+@receiver(post_init, sender=Attribute)
+def remember_numeric_settings(sender, instance, **kwargs):
+    instance._numeric_settings = loaded_values(instance, "is_numeric", "unit")
+
+
+@receiver(post_save, sender=Attribute)
+def refresh_numeric_values(sender, instance, created, **kwargs):
+    numeric_settings = (instance.is_numeric, instance.unit)
+    if not created and numeric_settings != instance._numeric_settings:
+        instance.refresh_numeric_values()
+    instance._numeric_settings = numeric_settings
+
+
+@receiver([post_save, post_delete], sender=Attribute)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_facets(sender, **kwargs):
+    transaction.on_commit(facet_index.invalidate)
+
+
+@receiver(post_save, sender=Good)
+def update_good_facets(sender, instance, **kwargs):
+    values = (
+        instance.pk,
+        instance.category_id,
+        instance.brand_id,
+        instance.quantity,
+        instance.sale_percent,
+        instance.price,
+    )
+    transaction.on_commit(lambda: facet_index.update_good(*values))
+
+
+@receiver(post_delete, sender=Good)
+def remove_good_facets(sender, instance, **kwargs):
+    good_id = instance.pk
+    transaction.on_commit(lambda: facet_index.remove_good(good_id))
+
+
+@receiver(post_save, sender=AttributeValue)
+def update_attribute_value_facets(sender, instance, **kwargs):
+    values = (instance.good_id, instance.attribute_id, instance.value)
+    transaction.on_commit(lambda: facet_index.set_attribute_value(*values))
+
+
+@receiver(post_delete, sender=AttributeValue)
+def remove_attribute_value_facets(sender, instance, **kwargs):
+    values = (instance.good_id, instance.attribute_id, None)
+    transaction.on_commit(lambda: facet_index.set_attribute_value(*values))
+
+
+@receiver([post_save, post_delete], sender=Attribute)
+def invalidate_attribute_index(sender, **kwargs):
+    transaction.on_commit(attribute_index.invalidate)
+
+
+@receiver(post_delete, sender=Good)
+def remove_good_attribute_index(sender, instance, **kwargs):
+    good_id = instance.pk
+    transaction.on_commit(lambda: attribute_index.remove_good(good_id))
+
+
+@receiver(post_save, sender=AttributeValue)
+def update_attribute_index(sender, instance, **kwargs):
+    values = (instance.good_id, instance.attribute_id, instance.value)
+    transaction.on_commit(lambda: attribute_index.set_value(*values))
+
+
+@receiver(post_delete, sender=AttributeValue)
+def remove_attribute_index_value(sender, instance, **kwargs):
+    values = (instance.good_id, instance.attribute_id, None)
+    transaction.on_commit(lambda: attribute_index.set_value(*values))
+
+
+@receiver(post_init, sender=AttributeValue)
+def remember_attribute_value_owner(sender, instance, **kwargs):
+    instance._owner = loaded_values(instance, "good_id", "attribute_id")
+
+
+@receiver(post_save, sender=AttributeValue)
+def forget_moved_attribute_value(sender, instance, created, **kwargs):
+    # The receivers above only see the new (good, attribute); a value moved
+    # to another good or attribute must also leave its previous entries.
+    previous = getattr(instance, "_owner", (None, None))
+    instance._owner = (instance.good_id, instance.attribute_id)
+    if created or None in previous or previous == instance._owner:
+        return
+    good_id, attribute_id = previous
+
+    def forget():
+        facet_index.set_attribute_value(good_id, attribute_id, None)
+        attribute_index.set_value(good_id, attribute_id, None)
+
+    transaction.on_commit(forget)
+    if good_id != instance.good_id:
+        refresh_search_documents([good_id])
+        Good.objects.filter(pk=good_id).update(updated_at=timezone.now())
+        transaction.on_commit(lambda: document_queue.add(good_ids=[good_id]))
+        transaction.on_commit(lambda: invalidate_good(good_id=good_id))
+
+
+@receiver(post_save, sender=Good)
+def refresh_good_search_document(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCH_DOCUMENT_FIELDS & set(update_fields):
+        return
+    refresh_search_documents([instance.pk])
+
+
+@receiver(post_delete, sender=Good)
+def remove_good_search_document(sender, instance, **kwargs):
+    remove_search_documents([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=AttributeValue)
+def refresh_attribute_value_search_document(sender, instance, **kwargs):
+    refresh_search_documents([instance.good_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+def refresh_related_search_documents(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_documents(instance.goods.values_list("id", flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Brand)
+def remember_search_documents_to_refresh(sender, instance, **kwargs):
+    # Goods fall back to the default category/brand, so collect them before
+    # the relation is rewritten.
+    instance._search_good_ids = list(instance.goods.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+def refresh_search_documents_after_delete(sender, instance, **kwargs):
+    refresh_search_documents(getattr(instance, "_search_good_ids", []))
+
+
+@receiver(post_save, sender=Good)
+def update_good_suggestions(sender, instance, **kwargs):
+    values = ("goods", instance.pk, instance.name, instance.slug)
+    if instance.quantity:
+        transaction.on_commit(lambda: suggest_index.upsert(*values))
+    else:
+        transaction.on_commit(lambda: suggest_index.remove(*values[:2]))
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+def update_catalog_suggestions(sender, instance, **kwargs):
+    kind = "brands" if sender is Brand else "categories"
+    values = (kind, instance.pk, instance.name, instance.slug)
+    transaction.on_commit(lambda: suggest_index.upsert(*values))
+
+
+@receiver(post_delete, sender=Good)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Category)
+def remove_suggestion(sender, instance, **kwargs):
+    kind = {Good: "goods", Brand: "brands", Category: "categories"}[sender]
+    values = (kind, instance.pk)
+    transaction.on_commit(lambda: suggest_index.remove(*values))
+
+
+@receiver(post_init, sender=Good)
+def remember_navigation_state(sender, instance, **kwargs):
+    category_id, quantity = loaded_values(instance, "category_id", "quantity")
+    instance._navigation_state = (category_id, bool(quantity))
+
+
+@receiver(post_save, sender=Good)
+def update_navigation_on_good_save(sender, instance, created, **kwargs):
+    # Only a category move or a stock flip changes the menu counts.
+    state = (instance.category_id, bool(instance.quantity))
+    if created or state != getattr(instance, "_navigation_state", None):
+        transaction.on_commit(invalidate_navigation)
+    instance._navigation_state = state
+
+
+@receiver(post_delete, sender=Good)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Attribute)
+@receiver(m2m_changed, sender=Attribute.categories.through)
+def update_navigation(sender, **kwargs):
+    transaction.on_commit(invalidate_navigation)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Attribute)
+@receiver([post_save, post_delete], sender=AttributeGroup)
+def bump_catalog_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(CATALOG_VERSION))
+
+
+@receiver([post_save, post_delete], sender=Good)
+def bump_goods_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(GOODS_VERSION))
+
+
+@receiver([post_save, post_delete], sender=AttributeValue)
+@receiver([post_save, post_delete], sender=ProductImage)
+def touch_good(sender, instance, **kwargs):
+    # Attribute values and images are part of the good's detail payload.
+    good_id = instance.good_id
+    if good_id:
+        Good.objects.filter(pk=good_id).update(updated_at=timezone.now())
+        transaction.on_commit(lambda: document_queue.add(good_ids=[good_id]))
+    transaction.on_commit(lambda: bump_version(GOODS_VERSION))
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Attribute)
+@receiver([post_save, post_delete], sender=AttributeGroup)
+def invalidate_catalog_responses(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate_tags(CATALOG_TAG))
+
+
+@receiver(m2m_changed, sender=Attribute.categories.through)
+def invalidate_attribute_categories(sender, action, **kwargs):
+    # Which attributes a category offers is served by AttributeViewSet.
+    if action.startswith("post_"):
+        bump_catalog_version(sender)
+        invalidate_catalog_responses(sender)
+
+
+@receiver(post_init, sender=Good)
+def remember_cached_response_state(sender, instance, **kwargs):
+    instance._response_cache_state = loaded_values(instance, "slug", "category_id")
+
+
+@receiver([post_save, post_delete], sender=Good)
+def invalidate_good_responses(sender, instance, **kwargs):
+    previous_slug, previous_category_id = getattr(
+        instance, "_response_cache_state", (None, None)
+    )
+    category_ids = {instance.category_id, previous_category_id} - {None}
+    slugs = {instance.slug, previous_slug} - {None}
+
+    def invalidate():
+        for slug in slugs:
+            invalidate_good(slug=slug, category_ids=category_ids)
+
+    transaction.on_commit(invalidate)
+    instance._response_cache_state = (instance.slug, instance.category_id)
+
+
+@receiver([post_save, post_delete], sender=AttributeValue)
+@receiver([post_save, post_delete], sender=ProductImage)
+def invalidate_good_child_responses(sender, instance, **kwargs):
+    good_id = instance.good_id
+    if good_id:
+        transaction.on_commit(lambda: invalidate_good(good_id=good_id))
+
+
+# Goods whose documents render a field of the given catalog object.
+DOCUMENT_DEPENDENCIES = {
+    Category: lambda instance: Q(category_id=instance.pk),
+    Brand: lambda instance: Q(brand_id=instance.pk),
+    Group: lambda instance: Q(category__group_id=instance.pk),
+    Attribute: lambda instance: Q(
+        pk__in=AttributeValue.objects.filter(attribute_id=instance.pk).values("good_id")
+    ),
+    AttributeGroup: lambda instance: Q(
+        pk__in=AttributeValue.objects.filter(
+            attribute__group_id=instance.pk
+        ).values("good_id")
+    ),
+}
+
+
+def touch_documents(condition):
+    # Moving updated_at marks the current documents stale right away; the
+    # queue then renders them again after commit.
+    Good.objects.filter(condition).update(updated_at=timezone.now())
+    transaction.on_commit(lambda: document_queue.add(condition=condition))
+
+
+@receiver(post_save, sender=Good)
+def refresh_good_document(sender, instance, **kwargs):
+    good_id = instance.pk
+    transaction.on_commit(lambda: document_queue.add(good_ids=[good_id]))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=Attribute)
+@receiver(post_save, sender=AttributeGroup)
+def refresh_dependent_documents(sender, instance, created, **kwargs):
+    if not created:
+        touch_documents(DOCUMENT_DEPENDENCIES[sender](instance))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Brand)
+@receiver(pre_delete, sender=Group)
+def remember_documents_to_refresh(sender, instance, **kwargs):
+    # Goods and categories fall back to defaults without sending signals;
+    # attributes and their groups cascade to values, which touch their goods.
+    instance._document_good_ids = list(
+        Good.objects.filter(DOCUMENT_DEPENDENCIES[sender](instance)).values_list(
+            "id", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Group)
+def refresh_documents_after_delete(sender, instance, **kwargs):
+    good_ids = getattr(instance, "_document_good_ids", [])
+    if good_ids:
+        touch_documents(Q(pk__in=good_ids))
+
+
+def image_name(image):
+    # Before first access the loaded value is the stored name, not a FieldFile.
+    return getattr(image, "name", image) or ""
+
+
+@receiver(post_init, sender=Good)
+@receiver(post_init, sender=ProductImage)
+def remember_image(sender, instance, **kwargs):
+    image, variants = loaded_values(instance, "image", "image_variants")
+    instance._image_state = (image_name(image), variants)
+
+
+@receiver(post_save, sender=Good)
+@receiver(post_save, sender=ProductImage)
+def queue_image_variants(sender, instance, created, **kwargs):
+    previous_name, previous_variants = getattr(instance, "_image_state", ("", None))
+    name = image_name(instance.image)
+    if name == previous_name and not (created and name):
+        return
+    if name and getattr(settings, "IMAGE_PROCESSING_ASYNC", True):
+        # Rendering is left to the process_images worker.
+        fields = pending_image_fields(instance.image.storage, name)
+        for field, value in fields.items():
+            setattr(instance, field, value)
+        sender.objects.filter(pk=instance.pk).update(**fields)
+    else:
+        refresh_variants(instance)
+    variants = instance.image_variants
+    instance._image_state = (name, variants)
+
+    storage = instance.image.storage
+    keep = {variant["name"] for variant in variants.values()}
+    transaction.on_commit(lambda: delete_variants(storage, previous_variants, keep))
+
+
+@receiver(post_delete, sender=Good)
+@receiver(post_delete, sender=ProductImage)
+def delete_image_variants(sender, instance, **kwargs):
+    storage, variants = instance.image.storage, instance.image_variants
+    transaction.on_commit(lambda: delete_variants(storage, variants))
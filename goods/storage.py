@@ -0,0 +1,122 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, storages
+
+IMAGE_STORAGE_ALIAS = "images"
+IMAGE_MODELS = ("goods.Good", "goods.ProductImage")
+# <directory>/<first two hex digits>/<sha256><extension>
+CONTENT_NAME_RE = re.compile(r"(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}(?:\.[\w]+)?$")
+
+
+def get_image_storage():
+    return storages[IMAGE_STORAGE_ALIAS]
+
+
+def content_name(directory, digest, extension):
+    return posixpath.join(directory, digest[:2], f"{digest}{extension}")
+
+
+def is_content_name(name):
+    return bool(CONTENT_NAME_RE.search(name or ""))
+
+
+def file_fingerprint(stat):
+    """
+    Short version tag of a file that is not content-addressed, from its
+    size and modification time.
+    """
+    return hashlib.md5(
+        f"{stat.st_size}-{stat.st_mtime_ns}".encode(), usedforsecurity=False
+    ).hexdigest()[:12]
+
+
+def referenced_names():
+    """
+    Every storage name an image row or one of its variants points at.
+    """
+    names = set()
+    for label in IMAGE_MODELS:
+        rows = apps.get_model(label).objects.values_list("image", "image_variants")
+        for image, variants in rows.iterator():
+            if image:
+                names.add(image)
+            names.update(variant["name"] for variant in (variants or {}).values())
+    return names
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that keeps each distinct file once, named by the
+    SHA-256 of its content.
+
+    Uploads are hashed while they stream to a temporary file; when a blob
+    with the same digest exists the copy is dropped and the existing name is
+    returned. Rows share blobs, and an upload may be handed an existing blob
+    before its row is committed, so ``delete`` leaves content-addressed files
+    alone; ``gc_media`` purges the ones nothing refers to once they are older
+    than ``--min-age``.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is only known once the content has been hashed.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(dir=full_directory, prefix=".upload-")
+        try:
+            with os.fdopen(descriptor, "wb") as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = content_name(directory, digest.hexdigest(), extension)
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(temp_path)
+                # Restart the blob's --min-age grace period: the row about to
+                # refer to it may not be committed when gc_media next runs.
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                # Identical concurrent uploads replace each other atomically.
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        # Files saved before content addressing belong to a single row.
+        if name and not is_content_name(name):
+            super().delete(name)
+
+    def purge(self, name):
+        """
+        Delete ``name`` even if it is content-addressed; only for files known
+        to be unreferenced.
+        """
+        super().delete(name)
+
+    def url(self, name):
+        url = super().url(name)
+        if name and not is_content_name(name):
+            # Files stored before content addressing are versioned by a
+            # fingerprint so their URLs can be cached as immutable too.
+            try:
+                url = f"{url}?v={file_fingerprint(os.stat(self.path(name)))}"
+            except OSError:
+                pass
+        return url
@@ -0,0 +1,184 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from heapq import nsmallest
+
+from goods.models import Good, Brand, Category
+from goods.search import tokenize
+from goods.versions import VersionedIndex
+
+# Trigrams shared by more entries than this carry almost no signal and would
+# make typo matching scan most of the catalog.
+MAX_TRIGRAM_POSTINGS = 5000
+MIN_SIMILARITY = 0.3
+LAST_CHARACTER = chr(0x10FFFF)
+
+
+def trigrams(words):
+    grams = set()
+    for word in words:
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SuggestIndex(VersionedIndex):
+    """
+    Autocomplete over good, brand and category names.
+
+    Word prefixes are answered from a sorted token list with bisect; when
+    prefixes find too little, trigram similarity catches typos.
+    """
+
+    version_name = "suggest"
+    kinds = ("goods", "brands", "categories")
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self.entries = {}
+        self.tokens = []
+        self.trigrams = defaultdict(set)
+
+    def build(self):
+        self._reset()
+        for brand_id, name, slug in Brand.objects.values_list("id", "name", "slug"):
+            self._add(("brands", brand_id), name, slug, keep_sorted=False)
+        for category_id, name, slug in Category.objects.values_list(
+            "id", "name", "slug"
+        ):
+            self._add(("categories", category_id), name, slug, keep_sorted=False)
+        goods = Good.objects.filter(quantity__gt=0).values_list("id", "name", "slug")
+        for good_id, name, slug in goods.iterator():
+            self._add(("goods", good_id), name, slug, keep_sorted=False)
+        self.tokens.sort()
+
+    def _add(self, key, name, slug, keep_sorted=True):
+        words = set(tokenize(name))
+        grams = trigrams(words)
+        self.entries[key] = ({"id": key[1], "name": name, "slug": slug}, words, grams)
+        for word in words:
+            if keep_sorted:
+                insort(self.tokens, (word, key))
+            else:
+                self.tokens.append((word, key))
+        for gram in grams:
+            self.trigrams[gram].add(key)
+
+    def _remove(self, key):
+        stored = self.entries.pop(key, None)
+        if stored is None:
+            return
+        _, words, grams = stored
+        for word in words:
+            index = bisect_left(self.tokens, (word, key))
+            if index < len(self.tokens) and self.tokens[index] == (word, key):
+                del self.tokens[index]
+        for gram in grams:
+            self.trigrams[gram].discard(key)
+
+    # Incremental updates, called from signal handlers after commit and
+    # replayed by every process from the change log.
+
+    def _upsert(self, kind, object_id, name, slug):
+        self._remove((kind, object_id))
+        self._add((kind, object_id), name, slug)
+
+    def _remove_entry(self, kind, object_id):
+        self._remove((kind, object_id))
+
+    def upsert(self, kind, object_id, name, slug):
+        self.apply_change("_upsert", kind, object_id, name, slug)
+
+    def remove(self, kind, object_id):
+        self.apply_change("_remove_entry", kind, object_id)
+
+    # Queries.
+
+    def _prefix_range(self, prefix):
+        """
+        Slice of ``tokens`` holding the words that start with ``prefix``.
+        """
+        start = bisect_left(self.tokens, (prefix,))
+        # No word character sorts after U+10FFFF, so every token extending
+        # the prefix comes before it.
+        stop = bisect_left(self.tokens, (prefix + LAST_CHARACTER,), start)
+        return start, stop
+
+    def _prefix_matches(self, words):
+        """
+        Keys of entries having, for every query word, a word it prefixes.
+
+        Candidates come from the rarest prefix; the others only filter them
+        through each entry's own words, so no prefix's matches are cut short
+        before the intersection.
+        """
+        ranges = sorted(
+            ((word, *self._prefix_range(word)) for word in set(words)),
+            key=lambda item: item[2] - item[1],
+        )
+        word, start, stop = ranges[0]
+        keys = {key for _, key in self.tokens[start:stop]}
+        for word, _, _ in ranges[1:]:
+            if not keys:
+                break
+            keys = {
+                key
+                for key in keys
+                if any(token.startswith(word) for token in self.entries[key][1])
+            }
+        return keys
+
+    def _similar(self, words, exclude):
+        grams = trigrams(words)
+        shared = Counter()
+        for gram in grams:
+            postings = self.trigrams.get(gram)
+            if postings and len(postings) <= MAX_TRIGRAM_POSTINGS:
+                shared.update(postings)
+        scored = []
+        for key, count in shared.items():
+            if key in exclude:
+                continue
+            entry_grams = self.entries[key][2]
+            similarity = count / (len(grams) + len(entry_grams) - count)
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, key))
+        scored.sort(key=lambda item: -item[0])
+        return [key for _, key in scored]
+
+    def suggest(self, query, limit=5):
+        """
+        Return up to ``limit`` goods, brands and categories matching ``query``.
+        """
+        self.ensure_current()
+        words = tokenize(query)
+        result = {kind: [] for kind in self.kinds}
+        if not words:
+            return result
+
+        def rank(key):
+            name = self.entries[key][0]["name"]
+            return (not name.lower().startswith(words[0]), len(name), name)
+
+        with self._lock:
+            by_kind = defaultdict(list)
+            for key in self._prefix_matches(words):
+                by_kind[key[0]].append(key)
+            ranked = [
+                key
+                for kind in self.kinds
+                for key in nsmallest(limit, by_kind[kind], key=rank)
+            ]
+            if len(ranked) < limit * len(self.kinds):
+                ranked.extend(self._similar(words, exclude=set(ranked)))
+
+            for key in ranked:
+                kind = key[0]
+                if len(result[kind]) < limit:
+                    result[kind].append(dict(self.entries[key][0]))
+        return result
+
+
+suggest_index = SuggestIndex()
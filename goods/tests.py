@@ -1,3 +1,1350 @@
-from django.test import TestCase
+import base64
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.text import slugify
+from django.utils.translation import gettext_lazy
+from PIL import ExifTags, Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from cart.models import Order
+from goods.attribute_filters import attribute_filter_registry
+from goods.attribute_index import AttributeIndex, attribute_index
+from goods.checks import check_shared_caches
+from goods.documents import document_queue
+from goods.facets import FacetIndex, facet_index
+from goods.feeds import FeedRateThrottle, stream_feed
+from goods.management.commands.benchmark_catalog import Command as BenchmarkCatalog
+from goods.management.commands.import_catalog import Command as ImportCatalog, RowError
+from goods.navigation import NAVIGATION_CACHE_KEY
+from goods.media import parse_range
+from goods.models import (
+    Attribute,
+    AttributeValue,
+    Brand,
+    Category,
+    Good,
+    GoodDocument,
+    Group,
+    ProductImage,
+)
+from goods.serializers import GoodListSerializer, GoodSerializer
+from goods.renderers import FastJSONParser, FastJSONRenderer
+from goods.search import tokenize
+from goods.storage import get_image_storage, is_content_name
+from goods.suggest import suggest_index
+from goods.units import convert, parse_numeric_value, parse_quantity
+from goods.versions import _change_key, get_version
+
+# Query counts below are for the catalog alone, without cache round trips.
+LOCAL_MEMORY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+    },
+}
+
+
+@override_settings(GOOD_DOCUMENTS_ASYNC=False, IMAGE_PROCESSING_ASYNC=False)
+class CatalogTestCase(TestCase):
+    """
+    Base class: empty caches and a small catalog of in-stock goods.
+    """
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.group = Group.objects.create(name="Electronics")
+        self.category = Category.objects.create(name="Phones", group=self.group)
+        self.brand = Brand.objects.create(name="Acme")
+
+    def make_good(self, name, price="100.00", **kwargs):
+        kwargs.setdefault("category", self.category)
+        kwargs.setdefault("brand", self.brand)
+        kwargs.setdefault("quantity", 5)
+        kwargs.setdefault("slug", slugify(name))
+        return Good.objects.create(name=name, price=Decimal(price), **kwargs)
+
+
+def cold_start(index):
+    """
+    Forget everything ``index`` built, as in a freshly started worker.
+    """
+    with index._lock:
+        index._reset()
+        index._version = index._applied = None
+
+
+class CatalogCursorPaginationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        # Every good shares its price and review count: one long run of ties.
+        self.goods = [self.make_good(f"Tied {number}") for number in range(23)]
+
+    def walk(self, url, link="next"):
+        slugs, urls = [], []
+        while url:
+            urls.append(url)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            slugs.extend(item["slug"] for item in response.json()["results"])
+            url = response.json()[link]
+        return slugs, urls
+
+    def test_tied_sort_keys_page_by_id_without_offset(self):
+        for sort, expected in (
+            ("price_asc", sorted(self.goods, key=lambda good: good.pk)),
+            ("price_desc", sorted(self.goods, key=lambda good: -good.pk)),
+            ("popularity", sorted(self.goods, key=lambda good: -good.pk)),
+        ):
+            with self.subTest(sort=sort):
+                slugs, urls = self.walk(
+                    f"/api/v1/good/?pagination=cursor&sort={sort}&limit=5"
+                )
+                self.assertEqual(slugs, [good.slug for good in expected])
+                self.assertEqual(len(urls), 5)
+
+                caches["responses"].clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(urls[-1])
+                sql = " ".join(query["sql"] for query in queries).upper()
+                self.assertNotIn("OFFSET", sql)
+
+    def test_previous_links_walk_back_to_the_first_page(self):
+        forward, urls = self.walk(
+            "/api/v1/good/?pagination=cursor&sort=popularity&limit=5"
+        )
+        last_page = self.client.get(urls[-1]).json()
+        backward, _ = self.walk(last_page["previous"], link="previous")
+        pages = [backward[start : start + 5] for start in range(0, len(backward), 5)]
+        flattened = [slug for page in reversed(pages) for slug in page]
+        self.assertEqual(
+            flattened + [item["slug"] for item in last_page["results"]], forward
+        )
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ("garbage", "cD0xMA==", "cD1bIngiLCJ5Il0="):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    f"/api/v1/good/?pagination=cursor&sort=price_asc&cursor={cursor}"
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class OrderCursorPaginationTests(CatalogTestCase):
+    def test_orders_created_together_page_by_id(self):
+        user = get_user_model().objects.create_user("+380501234567", password="secret")
+        orders = [Order.objects.create(user=user) for _ in range(7)]
+        Order.objects.update(created_at=orders[0].created_at)
+        self.client.force_authenticate(user)
+
+        ids, url = [], "/api/v1/orders/?limit=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(order["id"] for order in response.json()["results"])
+            url = response.json()["next"]
+        self.assertEqual(ids, sorted((order.pk for order in orders), reverse=True))
+
+
+class AttributeFilterRegistryTests(CatalogTestCase):
+    def test_registry_is_invalidated_after_commit(self):
+        attribute_filter_registry.get_filters()
+        version = get_version(attribute_filter_registry.version_name)
+        with self.captureOnCommitCallbacks(execute=True):
+            Attribute.objects.create(name="Screen Size", is_numeric=True)
+            self.assertEqual(
+                get_version(attribute_filter_registry.version_name), version
+            )
+            self.assertNotIn("screen_size", attribute_filter_registry.get_filters())
+        self.assertIn("screen_size", attribute_filter_registry.get_filters())
+        self.assertIn("screen_size__min", attribute_filter_registry.get_filters())
+
+
+class FacetIndexTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.galaxy = self.make_good("Galaxy", price="900.00")
+        self.pixel = self.make_good("Pixel", price="800.00")
+
+    def counting_builds(self, index):
+        builds = []
+        build = index.build
+
+        def counted():
+            builds.append(1)
+            build()
+
+        index.build = counted
+        return builds
+
+    def test_cold_start_with_search_counts_matching_goods(self):
+        cold_start(facet_index)
+        response = self.client.get("/api/v1/good/facets/?search=galaxy")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total"], 1)
+        self.assertEqual(
+            [(brand["name"], brand["count"]) for brand in response.json()["brands"]],
+            [("Acme", 1)],
+        )
+
+    def test_good_changes_are_replayed_without_rebuilding(self):
+        other = FacetIndex()
+        other.ensure_current()
+        builds = self.counting_builds(other)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy.quantity = 0
+            self.galaxy.save()
+        self.assertEqual(other.facet_counts({})["total"], 1)
+        self.assertEqual(other.facet_counts({"in_stock": "false"})["total"], 1)
+        self.assertEqual(builds, [])
+
+        facet_index.invalidate()
+        other.facet_counts({})
+        self.assertEqual(builds, [1])
+
+    def test_gap_in_change_log_rebuilds(self):
+        other = FacetIndex()
+        other.ensure_current()
+        builds = self.counting_builds(other)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy.quantity = 0
+            self.galaxy.save()
+        cache.delete(_change_key(other.version_name, other._applied + 1))
+        self.assertEqual(other.facet_counts({})["total"], 1)
+        self.assertEqual(builds, [1])
+
+
+class SuggestTests(CatalogTestCase):
+    def test_tokenize_lowercases_words(self):
+        self.assertEqual(
+            tokenize("Galaxy S24, 8/256GB"), ["galaxy", "s24", "8", "256gb"]
+        )
+        self.assertEqual(tokenize(" -- "), [])
+
+    def test_rare_word_matches_beyond_common_prefix_matches(self):
+        for number in range(60):
+            self.make_good(f"Phone Model {number}")
+        self.make_good("Phone Zeta Ultra Max Edition")
+        cold_start(suggest_index)
+        goods = suggest_index.suggest("pho zet", limit=1)["goods"]
+        self.assertEqual(
+            [good["name"] for good in goods], ["Phone Zeta Ultra Max Edition"]
+        )
+
+    def test_ranks_shorter_names_first_and_caps_each_kind(self):
+        self.make_good("Case for Galaxy")
+        self.make_good("Galaxy Tab Extra")
+        self.make_good("Galaxy S")
+        cold_start(suggest_index)
+        result = suggest_index.suggest("galaxy", limit=2)
+        # Good names carry their category prefix.
+        self.assertEqual(
+            [good["name"] for good in result["goods"]],
+            ["Phone Galaxy S", "Phone Case for Galaxy"],
+        )
+        self.assertEqual(suggest_index.suggest("acm")["brands"][0]["name"], "Acme")
+
+
+class BuildGoodTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.command = ImportCatalog()
+        self.command.create_missing = False
+        self.command.load_maps()
+
+    def row(self, **overrides):
+        row = {
+            "name": " Galaxy ",
+            "category": "phones",
+            "brand": "ACME",
+            "price": "999.90",
+            "sale_percent": "10",
+            "quantity": "3",
+        }
+        row.update(overrides)
+        return row
+
+    def test_builds_unsaved_good_with_category_prefix(self):
+        good = self.command.build_good(self.row())
+        self.assertIsNone(good.pk)
+        self.assertEqual(good.name, "Phone Galaxy")
+        self.assertEqual(good.slug, "phone-galaxy")
+        self.assertEqual(good.category_id, self.category.pk)
+        self.assertEqual(good.brand_id, self.brand.pk)
+        self.assertEqual(good.price, Decimal("999.90"))
+        self.assertEqual((good.sale_percent, good.quantity), (10, 3))
+
+    def test_invalid_rows_raise_row_error(self):
+        missing_name = self.row()
+        del missing_name["name"]
+        for row in (
+            missing_name,
+            self.row(name=None),
+            self.row(name="  "),
+            self.row(category="Laptops"),
+            self.row(price="cheap"),
+            self.row(quantity="3.5"),
+            self.row(sale_percent="-1"),
+            self.row(sale_percent="101"),
+        ):
+            with self.subTest(row=row), self.assertRaises(RowError):
+                self.command.build_good(row)
+
+
+class UnitTests(SimpleTestCase):
+    def test_parse_quantity_normalizes_units(self):
+        self.assertEqual(parse_quantity("1,5 кг"), (Decimal("1.5"), "kg"))
+        self.assertEqual(parse_quantity('6.1"'), (Decimal("6.1"), "in"))
+        self.assertEqual(parse_quantity("16"), (Decimal("16"), ""))
+        self.assertEqual(parse_quantity("about 16 GB"), (None, ""))
+
+    def test_convert_between_units_of_one_dimension(self):
+        self.assertEqual(convert(Decimal("2"), "tb", "gb"), Decimal("2048"))
+        self.assertEqual(convert(Decimal("1500"), "g", "kg"), Decimal("1.5"))
+        self.assertEqual(convert(Decimal("3"), "w", "w"), Decimal("3"))
+        self.assertEqual(convert(Decimal("3"), "", ""), Decimal("3"))
+
+    def test_convert_rejects_incompatible_or_missing_units(self):
+        for unit, target_unit in (("gb", "kg"), ("", "gb"), ("gb", ""), ("w", "mah")):
+            with self.subTest(unit=unit, target_unit=target_unit):
+                self.assertIsNone(convert(Decimal("16"), unit, target_unit))
+
+    def test_parse_numeric_value(self):
+        self.assertEqual(parse_numeric_value("512 МБ", "GB"), (Decimal("0.5"), "gb"))
+        self.assertEqual(parse_numeric_value("16", "gb"), (None, ""))
+        self.assertEqual(parse_numeric_value("16 gb"), (Decimal("16"), "gb"))
+        self.assertEqual(parse_numeric_value("n/a", "gb"), (None, ""))
+
+
+class MediaTestCase(CatalogTestCase):
+    """
+    Catalog test case storing uploads under a temporary MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root))
+        self.storage = get_image_storage()
+
+    def image_file(self, size=(2000, 1000), color="red", name="photo.png", image=None):
+        buffer = BytesIO()
+        (image or Image.new("RGB", size, color)).save(buffer, "PNG")
+        return ContentFile(buffer.getvalue(), name=name)
+
+
+class ContentAddressedStorageTests(MediaTestCase):
+
+    def age(self, name, seconds=2 * 3600):
+        path = self.storage.path(name)
+        old = os.stat(path).st_mtime - seconds
+        os.utime(path, (old, old))
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.storage.save("goods/a.png", ContentFile(b"same bytes"))
+        second = self.storage.save("goods/b.png", ContentFile(b"same bytes"))
+        self.assertTrue(is_content_name(first))
+        self.assertEqual(first, second)
+        self.assertNotEqual(
+            first, self.storage.save("goods/c.png", ContentFile(b"other bytes"))
+        )
+
+    def test_delete_keeps_content_addressed_blobs(self):
+        name = self.storage.save("goods/a.png", ContentFile(b"shared"))
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+
+        # Files stored before content addressing keep their own names.
+        legacy = "goods/legacy.png"
+        with open(self.storage.path(legacy), "wb") as file:
+            file.write(b"legacy")
+        self.storage.delete(legacy)
+        self.assertFalse(self.storage.exists(legacy))
+
+    def test_gc_media_purges_old_unreferenced_blobs(self):
+        kept = self.storage.save("goods/kept.png", ContentFile(b"kept"))
+        orphan = self.storage.save("goods/orphan.png", ContentFile(b"orphan"))
+        young = self.storage.save("goods/young.png", ContentFile(b"young"))
+        Good.objects.filter(pk=self.make_good("Galaxy").pk).update(image=kept)
+        for name in (kept, orphan):
+            self.age(name)
+
+        call_command("gc_media", stdout=StringIO())
+        self.assertTrue(self.storage.exists(kept))
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(young))
+
+    def test_reused_blob_restarts_its_grace_period(self):
+        name = self.storage.save("goods/a.png", ContentFile(b"reused"))
+        self.age(name)
+        # A new row is about to refer to the blob but is not committed yet.
+        self.storage.save("goods/b.png", ContentFile(b"reused"))
+        call_command("gc_media", stdout=StringIO())
+        self.assertTrue(self.storage.exists(name))
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_caches_are_reported(self):
+        self.assertEqual(check_shared_caches(None), [])
+        local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        with self.settings(CACHES={"default": local, "responses": local}):
+            warnings = check_shared_caches(None)
+        self.assertEqual(
+            [warning.obj for warning in warnings], ["default", "responses"]
+        )
+        self.assertEqual({warning.id for warning in warnings}, {"goods.W001"})
+
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class GoodListQueryTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.color = Attribute.objects.create(name="Color")
+        self.material = Attribute.objects.create(name="Material")
+        self.goods = []
+        self.seed(12)
+
+    def seed(self, count):
+        for _ in range(count):
+            number = len(self.goods)
+            good = self.make_good(f"Model {number}", reviews_count=number)
+            AttributeValue.objects.create(
+                good=good, attribute=self.color, value=("red", "blue")[number % 2]
+            )
+            AttributeValue.objects.create(
+                good=good, attribute=self.material, value="steel"
+            )
+            self.goods.append(good)
+        # Attribute signals only invalidate after commit.
+        attribute_filter_registry.invalidate()
+        attribute_index.invalidate()
+
+    def list_ids(self, url, queries):
+        # Build the in-memory indexes, then measure a response cache miss.
+        self.client.get(url)
+        caches["responses"].clear()
+        with CaptureQueriesContext(connection) as captured:
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        sql = " ".join(query["sql"] for query in captured).upper()
+        self.assertNotIn("DISTINCT", sql)
+        ids = [item["id"] for item in response.json()["results"]]
+        self.assertEqual(len(ids), len(set(ids)))
+        return ids
+
+    def test_query_count_does_not_grow_with_matches(self):
+        urls = {
+            "/api/v1/good/?color=red,blue&material=steel&brand=Acme": 2,
+            "/api/v1/good/?search=model&color=red&limit=100": 2,
+            "/api/v1/good/?pagination=cursor&sort=popularity&limit=100": 1,
+        }
+        for url, queries in urls.items():
+            with self.subTest(url=url):
+                self.assertTrue(self.list_ids(url, queries))
+        self.seed(24)
+        for url, queries in urls.items():
+            with self.subTest(url=url, goods=len(self.goods)):
+                self.list_ids(url, queries)
+
+    def test_sql_attribute_filters_keep_one_row_per_good(self):
+        url = "/api/v1/good/?color=red&material=steel&limit=100"
+        # Too broad for the in-memory index: the semi-joins do the filtering.
+        with mock.patch("goods.attribute_index.MAX_INDEXED_MATCHES", 0):
+            with CaptureQueriesContext(connection) as captured:
+                ids = self.list_ids(url, 2)
+        self.assertIn("goods_attributevalue", captured[-1]["sql"])
+        self.assertEqual(sorted(ids), [good.pk for good in self.goods[::2]])
+
+    def test_benchmark_compares_with_join_and_distinct(self):
+        output = StringIO()
+        call_command(
+            "benchmark_catalog",
+            goods=60,
+            categories=2,
+            brands=3,
+            repeat=1,
+            no_explain=True,
+            stdout=output,
+        )
+        report = output.getvalue()
+        self.assertEqual(report.count("current: count"), 9)
+        self.assertEqual(report.count("join + distinct: count"), 9)
+        self.assertFalse(Good.objects.filter(slug__startswith="bench-").exists())
+
+        command = BenchmarkCatalog()
+        command.attributes = [self.color]
+        params = {attribute_filter_registry.filter_name("Color"): "red"}
+        self.assertNotIn("DISTINCT", str(command.build_queryset(params).query))
+        self.assertIn("DISTINCT", str(command.build_join_queryset(params).query))
+        self.assertEqual(
+            set(command.build_queryset(params)),
+            set(command.build_join_queryset(params)),
+        )
+
+
+class MediaServingTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 4
+        self.name = self.storage.save("goods/blob.bin", ContentFile(self.content))
+        self.url = f"/media/{self.name}"
+
+    def get(self, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        if response.streaming:
+            response.body = b"".join(response.streaming_content)
+        return response
+
+    def test_parse_range(self):
+        for header, expected in (
+            ("bytes=0-99", (0, 99)),
+            ("bytes=100-", (100, 999)),
+            ("bytes=-100", (900, 999)),
+            ("bytes=990-5000", (990, 999)),
+            ("bytes = 5 - 9", (5, 9)),
+            ("bytes=-5000", (0, 999)),
+            ("bytes=1000-", (1000, 1000)),
+            ("bytes=9-5", None),
+            ("bytes=-", None),
+            ("bytes=0-1,5-6", None),
+            ("items=0-1", None),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 1000), expected)
+        self.assertEqual(parse_range("bytes=0-", 0), (0, 0))
+
+    def test_content_addressed_files_are_immutable(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, self.content)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_legacy_files_are_immutable_only_at_their_fingerprint(self):
+        with open(self.storage.path("goods/legacy.bin"), "wb") as file:
+            file.write(b"legacy")
+        url = self.storage.url("goods/legacy.bin")
+        self.assertIn("?v=", url)
+        self.assertIn("immutable", self.get(url)["Cache-Control"])
+        self.assertEqual(
+            self.get(url.split("?")[0])["Cache-Control"], "public, no-cache"
+        )
+
+    def test_byte_ranges(self):
+        response = self.get(HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.body, self.content[10:20])
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+
+        response = self.get(HTTP_RANGE="bytes=-4")
+        self.assertEqual(response.body, self.content[-4:])
+
+        response = self.get(HTTP_RANGE="bytes=2048-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_if_range_falls_back_to_the_whole_file(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(
+            self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag).status_code, 206
+        )
+        response = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, self.content)
+
+    def test_front_server_offload_sends_no_body(self):
+        with self.settings(MEDIA_ACCEL_REDIRECT="/protected/"):
+            response = self.get()
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected/{self.name}")
+        self.assertEqual(response.content, b"")
+
+    def test_paths_outside_media_are_not_found(self):
+        for path in ("../settings.py", "goods/.hidden", "goods/missing.bin"):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(f"/media/{path}").status_code, 404)
+
+
+class ResponseCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.good = self.make_good("Galaxy")
+
+    def test_entries_are_kept_per_host_and_scheme(self):
+        url = "/api/v1/good/"
+        first = self.client.get(url, HTTP_HOST="localhost")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url, HTTP_HOST="localhost")["X-Cache"], "HIT")
+        for headers in ({"HTTP_HOST": "127.0.0.1"}, {"secure": True}):
+            with self.subTest(**headers):
+                response = self.client.get(url, **headers)
+                self.assertEqual(response["X-Cache"], "MISS")
+                self.assertNotIn("http://localhost/", response.content.decode())
+
+    def test_attaching_an_attribute_to_a_category_evicts_listings(self):
+        attribute = Attribute.objects.create(name="Color")
+        url = f"/api/v1/attribute/?category={self.category.pk}"
+        self.assertEqual(self.client.get(url).json(), [])
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            attribute.categories.add(self.category)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual([item["name"] for item in response.json()], ["Color"])
+
+    def x_cache(self, url, **extra):
+        return self.client.get(url, **extra).get("X-Cache")
+
+    def test_query_parameters_are_keyed_in_sorted_order(self):
+        self.assertEqual(self.x_cache("/api/v1/good/?limit=5&sort=price_asc"), "MISS")
+        self.assertEqual(self.x_cache("/api/v1/good/?sort=price_asc&limit=5"), "HIT")
+        self.assertEqual(self.x_cache("/api/v1/good/?sort=price_desc&limit=5"), "MISS")
+
+    def test_signed_in_users_bypass_the_cache(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("+380501234567", password="secret")
+        )
+        self.assertIsNone(self.x_cache("/api/v1/good/"))
+        self.assertIsNone(self.x_cache("/api/v1/good/"))
+
+    def test_saving_a_good_evicts_only_pages_that_can_show_it(self):
+        tablets = Category.objects.create(name="Tablets", group=self.group)
+        self.make_good("Tab", category=tablets)
+        urls = {
+            "detail": f"/api/v1/good/{self.good.slug}/",
+            "list": "/api/v1/good/",
+            "phones": "/api/v1/good/?category=phones",
+            "tablets": "/api/v1/good/?category=tablets",
+            "attributes": "/api/v1/attribute/",
+        }
+        for url in urls.values():
+            self.x_cache(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.good.price = Decimal("90.00")
+            self.good.save()
+        self.assertEqual(
+            {name: self.x_cache(url) for name, url in urls.items()},
+            {
+                "detail": "MISS",
+                "list": "MISS",
+                "phones": "MISS",
+                "tablets": "HIT",
+                "attributes": "HIT",
+            },
+        )
+
+
+class GoodDetailFieldsTests(CatalogTestCase):
+    private_fields = {"search_document", "rating_sum", "avg_rating", "updated_at"}
+
+    def test_detail_hides_bookkeeping_columns(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            good = self.make_good("Galaxy")
+        self.assertTrue(GoodDocument.objects.filter(good=good).exists())
+        stored = self.client.get(f"/api/v1/good/{good.slug}/")
+        GoodDocument.objects.all().delete()
+        caches["responses"].clear()
+        live = self.client.get(f"/api/v1/good/{good.slug}/")
+        for response in (live, stored):
+            payload = response.json()
+            self.assertEqual(payload["name"], "Phone Galaxy")
+            self.assertFalse(self.private_fields & payload.keys())
+
+
+class ImportCatalogTests(CatalogTestCase):
+    def import_feed(self, lines, *args):
+        feed = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        self.addCleanup(os.remove, feed.name)
+        with feed:
+            feed.write("\n".join(["name,slug,category,brand,price,quantity", *lines]))
+        with mock.patch(
+            "goods.management.commands.import_catalog.goods_changed_in_bulk"
+        ) as changed:
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command(
+                    "import_catalog",
+                    feed.name,
+                    *args,
+                    stdout=StringIO(),
+                    stderr=StringIO(),
+                )
+        return changed
+
+    def test_invalidates_once_after_the_last_chunk(self):
+        laptops = Category.objects.create(name="Laptops", group=self.group)
+        moved = self.make_good("Moved", category=laptops)
+        changed = self.import_feed(
+            [
+                *(
+                    f"Model {number},model-{number},Phones,Acme,10,1"
+                    for number in range(5)
+                ),
+                f"Moved,{moved.slug},Phones,Acme,10,1",
+                "Broken,broken,Phones,Acme,cheap,1",
+            ],
+            "--chunk-size",
+            "2",
+        )
+        changed.assert_called_once()
+        self.assertEqual(
+            set(changed.call_args.kwargs["slugs"]),
+            {moved.slug, *(f"model-{number}" for number in range(5))},
+        )
+        self.assertEqual(
+            changed.call_args.kwargs["category_ids"], {self.category.pk, laptops.pk}
+        )
+        moved.refresh_from_db()
+        self.assertEqual(moved.category, self.category)
+        self.assertFalse(Good.objects.filter(slug="broken").exists())
+
+    def test_nothing_imported_invalidates_nothing(self):
+        changed = self.import_feed(["Broken,broken,Unknown,Acme,10,1"])
+        changed.assert_not_called()
+
+
+class AttributeValueMoveTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.color = Attribute.objects.create(name="Color")
+        self.material = Attribute.objects.create(name="Material")
+        self.galaxy = self.make_good("Galaxy")
+        self.pixel = self.make_good("Pixel")
+        self.value = AttributeValue.objects.create(
+            good=self.galaxy, attribute=self.color, value="red"
+        )
+        for index in (facet_index, attribute_index):
+            index.invalidate()
+            index.ensure_current()
+
+    def move(self, **changes):
+        value = AttributeValue.objects.get(pk=self.value.pk)
+        for field, new in changes.items():
+            setattr(value, field, new)
+        with self.captureOnCommitCallbacks(execute=True):
+            value.save()
+
+    def facet_values(self, attribute):
+        counts = facet_index.facet_counts({})["attributes"]
+        return {
+            (item["value"], item["count"])
+            for data in counts
+            if data["id"] == attribute.pk
+            for item in data["values"]
+        }
+
+    def test_moving_to_another_good_leaves_the_old_good(self):
+        self.move(good=self.pixel)
+        self.assertEqual(
+            attribute_index.matching_ids({"Color": ["red"]}), [self.pixel.pk]
+        )
+        self.assertEqual(self.facet_values(self.color), {("red", 1)})
+
+    def test_moving_to_another_attribute_leaves_the_old_attribute(self):
+        self.move(attribute=self.material)
+        self.assertEqual(attribute_index.matching_ids({"Color": ["red"]}), [])
+        self.assertEqual(
+            attribute_index.matching_ids({"Material": ["red"]}), [self.galaxy.pk]
+        )
+        self.assertEqual(self.facet_values(self.color), set())
+        self.assertEqual(self.facet_values(self.material), {("red", 1)})
+
+
+class AttributeIndexTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.color = Attribute.objects.create(name="Color")
+        self.ram = Attribute.objects.create(name="RAM")
+        specs = [("red", "8gb"), ("blue", "8gb"), ("red ", "16gb"), ("green", "8gb")]
+        self.goods = []
+        for number, (color, ram) in enumerate(specs):
+            good = self.make_good(f"Model {number}")
+            AttributeValue.objects.create(good=good, attribute=self.color, value=color)
+            AttributeValue.objects.create(good=good, attribute=self.ram, value=ram)
+            self.goods.append(good.pk)
+        attribute_filter_registry.invalidate()
+        attribute_index.invalidate()
+
+    def api_ids(self, query):
+        caches["responses"].clear()
+        results = self.client.get(f"/api/v1/good/?{query}&limit=100").json()
+        return sorted(card["id"] for card in results["results"])
+
+    def test_values_are_ored_and_attributes_anded(self):
+        red, blue, red_16, green = self.goods
+        for selections, expected in (
+            # Stored values match exactly, like the SQL filter.
+            ({"Color": ["red"]}, [red]),
+            ({"Color": [" red", "blue"], "RAM": ["8gb"]}, [red, blue]),
+            ({"Color": ["green"], "RAM": ["16gb"]}, []),
+            ({"Color": ["purple"]}, []),
+            ({"RAM": ["16gb"]}, [red_16]),
+        ):
+            with self.subTest(selections=selections):
+                self.assertEqual(attribute_index.matching_ids(selections), expected)
+        with mock.patch("goods.attribute_index.MAX_INDEXED_MATCHES", 1):
+            self.assertIsNone(attribute_index.matching_ids({"RAM": ["8gb"]}))
+
+    def test_index_and_sql_filters_agree(self):
+        color = attribute_filter_registry.filter_name("Color")
+        ram = attribute_filter_registry.filter_name("RAM")
+        for query in (
+            f"{color}=red",
+            f"{color}=red,blue&{ram}=8gb",
+            f"{color}=green&{ram}=16gb",
+        ):
+            with self.subTest(query=query):
+                indexed = self.api_ids(query)
+                with mock.patch("goods.attribute_index.MAX_INDEXED_MATCHES", 0):
+                    self.assertEqual(self.api_ids(query), indexed)
+
+    def test_other_processes_replay_changes_without_rebuilding(self):
+        worker = AttributeIndex()
+        self.assertEqual(len(worker.matching_ids({"RAM": ["16gb"]})), 1)
+        value = AttributeValue.objects.get(good_id=self.goods[1], attribute=self.ram)
+        value.value = "16gb"
+        with self.captureOnCommitCallbacks(execute=True):
+            value.save()
+        with mock.patch.object(worker, "build", side_effect=AssertionError):
+            self.assertEqual(worker.matching_ids({"RAM": ["16gb"]}), self.goods[1:3])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    payload = {
+        "price": Decimal("1999.90"),
+        "rating": 4.25,
+        "count": 3,
+        "ok": True,
+        "missing": None,
+        "name": "Смартфон \u2028 «Galaxy»",
+        "label": gettext_lazy("Price"),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "created": datetime.datetime(
+            2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+        ),
+        "day": datetime.date(2024, 5, 1),
+        "nested": [{"a": [1, 2.5, Decimal("0.10")]}, []],
+        7: "non-string key",
+    }
+
+    def test_output_matches_the_stock_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload),
+            JSONRenderer().render(self.payload),
+        )
+
+    def test_strict_json_rejects_non_finite_decimals(self):
+        for value in (Decimal("NaN"), Decimal("Infinity")):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                FastJSONRenderer().render({"price": value})
+
+    def test_parser_round_trips_rendered_content(self):
+        content = FastJSONRenderer().render({"name": "Galaxy", "tags": ["a", "б"]})
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(content)),
+            {"name": "Galaxy", "tags": ["a", "б"]},
+        )
+
+
+class FeedTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.goods = [self.make_good(f"Feed {number}") for number in range(5)]
+        self.goods[0].quantity = 0
+        self.goods[0].save()
+        self.user = get_user_model().objects.create_user(
+            "+380501234567", password="secret"
+        )
+
+    def feed_lines(self, response):
+        content = b"".join(response.streaming_content)
+        if response.get("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_anonymous_clients_are_refused(self):
+        response = self.client.get("/api/v1/good/feed/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_streams_every_good_in_id_order(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/v1/good/feed/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertNotIn("Content-Encoding", response)
+        lines = self.feed_lines(response)
+        self.assertEqual([line["id"] for line in lines], [g.pk for g in self.goods])
+        self.assertEqual(lines[0]["in_stock"], False)
+
+    def test_gzips_when_accepted(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            "/api/v1/good/feed/?feed=jsonl", HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(len(self.feed_lines(response)), 5)
+
+    def test_reads_the_catalog_in_keyset_chunks(self):
+        # Three chunks of one good query and two prefetches, then an empty one.
+        with self.assertNumQueries(10):
+            content = b"".join(stream_feed("jsonl", str, chunk_size=2))
+        self.assertEqual(len(content.splitlines()), 5)
+
+    def test_requests_past_the_feed_rate_are_throttled(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(FeedRateThrottle, "THROTTLE_RATES", {"feed": "1/hour"}):
+            self.assertEqual(self.client.get("/api/v1/good/feed/").status_code, 200)
+            self.assertEqual(self.client.get("/api/v1/good/feed/").status_code, 429)
+
+
+class GoodListSerializerTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy = self.make_good("Galaxy", price="900.00", sale_percent=10)
+            self.pixel = self.make_good("Pixel", quantity=0)
+
+    def test_list_returns_compact_cards(self):
+        results = self.client.get("/api/v1/good/").json()["results"]
+        self.assertEqual(len(results), 1)
+        card = results[0]
+        self.assertEqual(list(card), GoodListSerializer.Meta.fields)
+        self.assertEqual(
+            {
+                key: card[key]
+                for key in ("name", "final_price", "in_stock", "brand_name")
+            },
+            {
+                "name": "Phone Galaxy",
+                "final_price": "810.00",
+                "in_stock": True,
+                "brand_name": "Acme",
+            },
+        )
+
+    def test_all_includes_goods_out_of_stock(self):
+        results = self.client.get("/api/v1/good/all/").json()["results"]
+        self.assertEqual(
+            {card["slug"]: card["in_stock"] for card in results},
+            {self.galaxy.slug: True, self.pixel.slug: False},
+        )
+
+
+class GeneratedFinalPriceTests(CatalogTestCase):
+    cases = [
+        ("10.50", 0),
+        ("0.49", 0),
+        ("99.99", 15),
+        ("19.90", 50),
+        ("100.00", 5),
+        ("333.33", 33),
+        ("1.00", 100),
+    ]
+
+    def test_column_matches_calculate_final_price(self):
+        good = self.make_good("Galaxy")
+        for price, sale_percent in self.cases:
+            with self.subTest(price=price, sale_percent=sale_percent):
+                # A set-based write, which Good.save() never sees.
+                Good.objects.filter(pk=good.pk).update(
+                    price=Decimal(price), sale_percent=sale_percent
+                )
+                good.refresh_from_db()
+                self.assertEqual(good.final_price, good.calculate_final_price())
+
+    def test_save_reloads_the_generated_value(self):
+        good = self.make_good("Galaxy", price="10.40")
+        self.assertEqual(good.final_price, Decimal("10"))
+        good.price = Decimal("10.60")
+        good.save()
+        self.assertEqual(good.final_price, Decimal("11"))
+
+    def test_api_renders_a_decimal_string(self):
+        good = self.make_good("Galaxy", price="900.00", sale_percent=10)
+        GoodDocument.objects.all().delete()
+        detail = self.client.get(f"/api/v1/good/{good.slug}/").json()
+        card = self.client.get("/api/v1/good/").json()["results"][0]
+        self.assertEqual((detail["final_price"], card["final_price"]), ("810.00",) * 2)
+
+
+class SearchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.color = Attribute.objects.create(name="Color")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy = self.make_good("Galaxy")
+            self.pixel = self.make_good(
+                "Pixel", brand=Brand.objects.create(name="Zeta")
+            )
+            self.red = AttributeValue.objects.create(
+                good=self.pixel, attribute=self.color, value="Crimson"
+            )
+
+    def search(self, value):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/api/v1/good/", {"search": value})
+        self.assertNotIn("DISTINCT", " ".join(q["sql"] for q in captured).upper())
+        return sorted(card["slug"] for card in response.json()["results"])
+
+    def test_matches_every_word_prefix_across_the_document(self):
+        self.assertEqual(self.search("gal"), [self.galaxy.slug])
+        self.assertEqual(self.search("zeta"), [self.pixel.slug])
+        self.assertEqual(self.search("crims phone"), [self.pixel.slug])
+        self.assertEqual(self.search("phones"), [self.galaxy.slug, self.pixel.slug])
+        self.assertEqual(self.search("crimson galaxy"), [])
+
+    def test_documents_follow_related_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = "Orbit"
+            self.brand.save()
+            self.red.value = "Scarlet"
+            self.red.save()
+        self.assertEqual(self.search("orbit"), [self.galaxy.slug])
+        self.assertEqual(self.search("crimson"), [])
+        self.assertEqual(self.search("scarlet"), [self.pixel.slug])
+
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class NavigationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tablets = Category.objects.create(name="Tablets", group=self.group)
+        Category.objects.create(name="Empty", group=self.group)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy = self.make_good("Galaxy")
+            self.make_good("Pixel", quantity=0)
+
+    def counts(self):
+        groups = self.client.get("/api/v1/group/").json()
+        return {
+            category["name"]: (category["goods_count"], category["in_stock_count"])
+            for group in groups
+            for category in group["categories"]
+        }
+
+    def test_menu_lists_categories_with_goods(self):
+        self.assertEqual(self.counts(), {"Phones": (2, 1)})
+        categories = self.client.get("/api/v1/category/").json()
+        self.assertEqual([category["name"] for category in categories], ["Phones"])
+
+    def test_tree_is_built_once_for_every_visitor(self):
+        self.client.get("/api/v1/group/")
+        caches["responses"].clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/v1/category/").status_code, 200)
+
+    def test_tree_follows_stock_and_category_changes(self):
+        self.counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy.price = Decimal("90.00")
+            self.galaxy.save()
+        self.assertIsNotNone(cache.get(NAVIGATION_CACHE_KEY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy.quantity = 0
+            self.galaxy.save()
+        self.assertEqual(self.counts(), {"Phones": (2, 0)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy.category = self.tablets
+            self.galaxy.save()
+        self.assertEqual(self.counts(), {"Phones": (1, 0), "Tablets": (1, 0)})
+
+
+class ConditionalGetTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.galaxy = self.make_good("Galaxy")
+        self.url = f"/api/v1/good/{self.galaxy.slug}/"
+
+    def test_matching_validators_skip_the_serializers(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        GoodDocument.objects.all().delete()
+        with mock.patch.object(
+            GoodSerializer, "to_representation", side_effect=AssertionError
+        ):
+            for headers in (
+                {"HTTP_IF_NONE_MATCH": response["ETag"]},
+                {"HTTP_IF_MODIFIED_SINCE": response["Last-Modified"]},
+            ):
+                with self.subTest(**headers):
+                    not_modified = self.client.get(self.url, **headers)
+                    self.assertEqual(not_modified.status_code, 304)
+                    self.assertEqual(not_modified["ETag"], response["ETag"])
+
+    def test_validators_change_with_the_good_and_the_catalog(self):
+        etags = [self.client.get(self.url)["ETag"]]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy.price = Decimal("90.00")
+            self.galaxy.save()
+        etags.append(self.client.get(self.url)["ETag"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = "Orbit"
+            self.brand.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["brand_name"], "Orbit")
+        etags.append(response["ETag"])
+        self.assertEqual(len(set(etags)), 3)
+
+    def test_list_etag_depends_on_query_and_accept(self):
+        etags = {
+            self.client.get(url, HTTP_ACCEPT=accept)["ETag"]
+            for url, accept in (
+                ("/api/v1/good/", "application/json"),
+                ("/api/v1/good/?limit=5", "application/json"),
+                ("/api/v1/good/", "text/html"),
+            )
+        }
+        self.assertEqual(len(etags), 3)
+
+
+class RepriceTests(CatalogTestCase):
+    url = "/api/v1/good/reprice/"
+
+    def setUp(self):
+        super().setUp()
+        self.staff = get_user_model().objects.create_user(
+            "+380501234567", password="secret", is_staff=True
+        )
+        self.zeta = Brand.objects.create(name="Zeta")
+        self.galaxy = self.make_good("Galaxy", price="99.99", brand=self.zeta)
+        self.pixel = self.make_good("Pixel", price="19.90", brand=self.zeta)
+        self.other = self.make_good("Other", price="50.00")
+
+    def reprice(self, data):
+        self.client.force_authenticate(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post(self.url, data, format="json")
+        updates = [q for q in captured if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        return response
+
+    def test_only_staff_can_reprice(self):
+        data = {"brand": "Zeta", "sale_percent": 10}
+        self.assertEqual(self.client.post(self.url, data).status_code, 401)
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "+380501234568", password="secret", email="shopper@example.com"
+            )
+        )
+        self.assertEqual(self.client.post(self.url, data).status_code, 403)
+
+    def test_requires_a_filter(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(self.url, {"sale_percent": 10}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_one_update_rounds_like_calculate_final_price(self):
+        response = self.reprice({"brand": "Zeta", "sale_percent": 15})
+        self.assertEqual(response.json(), {"updated": 2})
+        self.reprice({"ids": [self.galaxy.pk], "price_percent": "-12.5"})
+        for good in (self.galaxy, self.pixel, self.other):
+            good.refresh_from_db()
+            with self.subTest(good=good.slug):
+                self.assertEqual(good.final_price, good.calculate_final_price())
+        self.assertEqual(
+            [
+                (good.price, good.sale_percent, good.final_price)
+                for good in (self.galaxy, self.pixel, self.other)
+            ],
+            [
+                (Decimal("87.49"), 15, Decimal("74")),
+                (Decimal("19.90"), 15, Decimal("17")),
+                (Decimal("50.00"), None, Decimal("50")),
+            ],
+        )
+
+    def test_cached_pages_show_the_new_prices(self):
+        url = f"/api/v1/good/{self.galaxy.slug}/"
+        self.assertEqual(self.client.get(url).json()["final_price"], "100.00")
+        self.reprice({"category": "phones", "sale_percent": 50})
+        self.client.force_authenticate(None)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["final_price"], "50.00")
+
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class GoodDocumentTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.color = Attribute.objects.create(name="Color")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.galaxy = self.make_good("Galaxy")
+            AttributeValue.objects.create(
+                good=self.galaxy, attribute=self.color, value="Red"
+            )
+        self.url = f"/api/v1/good/{self.galaxy.slug}/"
+
+    def test_stored_documents_match_live_rendering(self):
+        urls = (self.url, "/api/v1/good/")
+        stored = [self.client.get(url).json() for url in urls]
+        GoodDocument.objects.all().delete()
+        caches["responses"].clear()
+        with mock.patch.object(document_queue, "add"):
+            live = [self.client.get(url).json() for url in urls]
+        self.assertEqual(stored, live)
+
+    def test_detail_is_served_without_the_serializers(self):
+        with mock.patch.object(
+            GoodSerializer, "to_representation", side_effect=AssertionError
+        ):
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url)
+        self.assertEqual(response.json()["attribute_values"][0]["value"], "Red")
+
+    def test_stale_documents_are_rendered_live_and_refreshed(self):
+        rendered_from = GoodDocument.objects.get().good_updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = "Orbit"
+            self.brand.save()
+        document = GoodDocument.objects.get()
+        self.assertGreater(document.good_updated_at, rendered_from)
+        self.assertIn('"brand_name":"Orbit"', document.detail)
+
+        # A write no signal sees: the stale document must not be served.
+        Good.objects.filter(pk=self.galaxy.pk).update(
+            price=Decimal("50.00"), updated_at=timezone.now()
+        )
+        caches["responses"].clear()
+        self.assertEqual(self.client.get(self.url).json()["final_price"], "50.00")
+        document = GoodDocument.objects.get()
+        self.assertIn('"final_price":"50.00"', document.detail)
+
+
+class ImageVariantTests(MediaTestCase):
+    def sizes(self, instance):
+        return {
+            variant: (data["width"], data["height"])
+            for variant, data in instance.image_variants.items()
+        }
+
+    def test_variants_fit_their_boxes_without_upscaling(self):
+        good = self.make_good("Galaxy", image=self.image_file())
+        self.assertEqual(good.image_status, "ready")
+        self.assertEqual(
+            self.sizes(good),
+            {"thumbnail": (160, 80), "card": (480, 240), "zoom": (1600, 800)},
+        )
+        for data in good.image_variants.values():
+            with self.storage.open(data["name"]) as file:
+                self.assertEqual(Image.open(file).format, "WEBP")
+
+        image = ProductImage.objects.create(
+            good=good, image=self.image_file((100, 50), name="small.png")
+        )
+        self.assertEqual(set(self.sizes(image).values()), {(100, 50)})
+
+    def test_api_exposes_variant_urls(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            good = self.make_good("Galaxy", image=self.image_file())
+        card = self.client.get(f"/api/v1/good/{good.slug}/").json()["image_variants"]
+        self.assertEqual(
+            card["card"],
+            {
+                "url": f"http://testserver{self.storage.url(good.image_variants['card']['name'])}",
+                "width": 480,
+                "height": 240,
+            },
+        )
+
+    def test_replacing_the_image_renders_new_variants(self):
+        good = self.make_good("Galaxy", image=self.image_file())
+        with self.captureOnCommitCallbacks(execute=True):
+            good.image = self.image_file((300, 600), color="blue", name="new.png")
+            good.save()
+        good.refresh_from_db()
+        self.assertEqual(self.sizes(good)["card"], (240, 480))
+
+    def test_unreadable_images_are_marked_failed(self):
+        with self.assertLogs("goods.images", "WARNING"):
+            good = self.make_good(
+                "Galaxy", image=ContentFile(b"not an image", name="broken.png")
+            )
+        good.refresh_from_db()
+        self.assertEqual((good.image_status, good.image_variants), ("failed", {}))
+
+
+class ImageMetadataTests(MediaTestCase):
+    def striped_file(self):
+        image = Image.new("RGB", (300, 200), "#1040c0")
+        image.paste((250, 250, 250), (0, 0, 60, 200))
+        return self.image_file(image=image)
+
+    def test_metadata_is_stored_with_the_variants(self):
+        good = self.make_good("Galaxy", image=self.striped_file())
+        self.assertEqual(
+            (good.image_width, good.image_height, good.image_color),
+            (300, 200, "#1040c0"),
+        )
+        prefix = "data:image/webp;base64,"
+        self.assertTrue(good.image_placeholder.startswith(prefix))
+        self.assertLess(len(good.image_placeholder), 400)
+        placeholder = Image.open(
+            BytesIO(base64.b64decode(good.image_placeholder[len(prefix) :]))
+        )
+        self.assertEqual(placeholder.size, (16, 11))
+
+    def test_list_cards_and_product_images_expose_it(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            good = self.make_good("Galaxy", image=self.striped_file())
+            ProductImage.objects.create(good=good, image=self.striped_file())
+        card = self.client.get("/api/v1/good/").json()["results"][0]
+        image = self.client.get(f"/api/v1/good/{good.slug}/").json()["images"][0]
+        for payload in (card, image):
+            self.assertEqual(
+                (
+                    payload["image_width"],
+                    payload["image_height"],
+                    payload["image_color"],
+                ),
+                (300, 200, "#1040c0"),
+            )
+            self.assertEqual(payload["image_placeholder"], good.image_placeholder)
+
+    @override_settings(IMAGE_PROCESSING_ASYNC=True)
+    def test_queued_images_get_dimensions_now_and_the_rest_on_backfill(self):
+        image = Image.new("RGB", (300, 200), "#1040c0")
+        exif = image.getexif()
+        exif[ExifTags.Base.Orientation] = 6
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", exif=exif)
+        good = self.make_good(
+            "Galaxy", image=ContentFile(buffer.getvalue(), name="rotated.jpg")
+        )
+        self.assertEqual(
+            (good.image_status, good.image_width, good.image_height, good.image_color),
+            ("pending", 200, 300, ""),
+        )
+        call_command("generate_image_variants", stdout=StringIO())
+        good.refresh_from_db()
+        self.assertEqual(good.image_status, "ready")
+        self.assertEqual((good.image_width, good.image_height), (200, 300))
+        self.assertTrue(good.image_placeholder)
@@ -0,0 +1,90 @@
+import re
+from decimal import Decimal
+
+QUANTITY_RE = re.compile(r"^\s*([-+]?\d+(?:[.,]\d+)?)\s*(.*?)\s*$")
+
+UNIT_ALIASES = {
+    '"': "in",
+    "inch": "in",
+    "дюйм": "in",
+    "дюймів": "in",
+    "г": "g",
+    "гр": "g",
+    "кг": "kg",
+    "мм": "mm",
+    "см": "cm",
+    "м": "m",
+    "мб": "mb",
+    "гб": "gb",
+    "тб": "tb",
+    "гц": "hz",
+    "мгц": "mhz",
+    "ггц": "ghz",
+    "вт": "w",
+    "мач": "mah",
+}
+
+# unit -> (base unit, how many base units it is worth)
+CONVERSIONS = {
+    "g": ("g", 1),
+    "kg": ("g", 1000),
+    "mm": ("mm", 1),
+    "cm": ("mm", 10),
+    "m": ("mm", 1000),
+    "mb": ("mb", 1),
+    "gb": ("mb", 1024),
+    "tb": ("mb", 1024 * 1024),
+    "hz": ("hz", 1),
+    "mhz": ("hz", 10**6),
+    "ghz": ("hz", 10**9),
+}
+
+
+def normalize_unit(unit):
+    unit = unit.strip().lower().rstrip(".")
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def parse_quantity(value):
+    """
+    Split strings like "16 GB" or "1,5 кг" into a Decimal and a normalized
+    unit. Return ``(None, "")`` when ``value`` does not start with a number.
+    """
+    match = QUANTITY_RE.match(value or "")
+    if not match:
+        return None, ""
+    return Decimal(match.group(1).replace(",", ".")), normalize_unit(match.group(2))
+
+
+def convert(number, unit, target_unit):
+    """
+    Express ``number`` ``unit`` in ``target_unit``; None when they measure
+    different things. A missing unit only matches another missing unit:
+    a bare "16" says nothing about whether it means GB or MB.
+    """
+    if unit == target_unit:
+        return number
+    if not unit or not target_unit:
+        return None
+    source = CONVERSIONS.get(unit)
+    target = CONVERSIONS.get(target_unit)
+    if source and target and source[0] == target[0]:
+        return number * source[1] / target[1]
+    return None
+
+
+def parse_numeric_value(value, attribute_unit=""):
+    """
+    Return ``(numeric value, unit)`` for an attribute value string, converted
+    to ``attribute_unit`` when one is set.
+    """
+    number, unit = parse_quantity(value)
+    if number is None:
+        return None, ""
+    target_unit = normalize_unit(attribute_unit)
+    if not target_unit:
+        return number, unit
+    converted = convert(number, unit, target_unit)
+    if converted is None:
+        return None, unit
+    return converted, target_unit
@@ -0,0 +1,194 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY_PREFIX = "goods:version:"
+# Processes that have not read an index for this long rebuild it instead of
+# replaying its change log.
+CHANGE_LOG_TIMEOUT = 60 * 60
+
+
+def _version_key(name):
+    return f"{VERSION_KEY_PREFIX}{name}"
+
+
+def _modified_key(name):
+    return f"{VERSION_KEY_PREFIX}{name}:modified"
+
+
+def _initial_version():
+    # Seed from the clock so a flushed cache never hands out a version number
+    # that was already seen before the flush.
+    return int(time.time() * 1000)
+
+
+def get_version(name):
+    """
+    Return the current value of a catalog version counter shared by all workers.
+    """
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """
+    Advance a version counter so every worker drops state built from the old one.
+    """
+    key = _version_key(name)
+    cache.set(_modified_key(name), time.time(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+        return cache.incr(key)
+
+
+def _change_head_key(name):
+    return f"{VERSION_KEY_PREFIX}{name}:changes"
+
+
+def _change_key(name, number):
+    return f"{VERSION_KEY_PREFIX}{name}:change:{number}"
+
+
+def get_change_head(name):
+    """
+    Number of the latest change logged for ``name``.
+    """
+    key = _change_head_key(name)
+    head = cache.get(key)
+    if head is None:
+        # Like versions, restart far above any number handed out before, so
+        # processes holding an older position see a gap and rebuild.
+        cache.add(key, _initial_version(), timeout=None)
+        head = cache.get(key)
+    return head
+
+
+def log_change(name, change):
+    """
+    Append ``change`` to the shared change log of ``name`` and return its
+    number.
+    """
+    number = get_change_head(name) + 1
+    while not cache.add(_change_key(name, number), change, CHANGE_LOG_TIMEOUT):
+        number += 1
+    cache.set(_change_head_key(name), number, timeout=None)
+    return number
+
+
+def get_last_modified(*names):
+    """
+    Return the Unix time of the latest bump of any of ``names``, if known.
+    """
+    modified = [
+        value
+        for value in cache.get_many([_modified_key(name) for name in names]).values()
+        if value is not None
+    ]
+    return max(modified) if modified else None
+
+
+class VersionedIndex:
+    """
+    Base class for in-process structures derived from the catalog.
+
+    Subclasses implement ``build``. Two kinds of change reach other workers
+    through the shared cache:
+
+    - ``invalidate`` bumps the index version; every process rebuilds on its
+      next read. Used for structural edits (attributes, categories, bulk
+      writes).
+    - ``apply_change`` appends ``(method, args)`` to a change log and every
+      process replays it on its own copy on the next read. Used for
+      per-good edits, so a stock decrement does not cost each worker a
+      rebuild from full table scans.
+
+    A log slot is claimed with ``cache.add``, which is atomic on every
+    backend that can be shared (Redis, Memcached, database). A process that
+    finds a gap in the log (expired entries) or is too far behind rebuilds
+    instead.
+    """
+
+    version_name = None
+    # Replaying more changes than this is slower than a rebuild.
+    max_replay = 1000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._applied = None
+
+    def build(self):
+        raise NotImplementedError
+
+    def _state_keys(self, applied=None):
+        keys = [_version_key(self.version_name), _change_head_key(self.version_name)]
+        if applied is not None:
+            keys.append(_change_key(self.version_name, applied + 1))
+        return keys
+
+    def ensure_current(self):
+        keys = self._state_keys(self._applied)
+        state = cache.get_many(keys)
+        version = state.get(keys[0])
+        if version is None:
+            version = get_version(self.version_name)
+        head = state.get(keys[1])
+        pending = state.get(keys[2]) if len(keys) > 2 else None
+        if (
+            version == self._version
+            and pending is None
+            and (head is None or head <= self._applied)
+        ):
+            return
+        with self._lock:
+            if version != self._version or not self._replay():
+                # Changes logged during the build are replayed afterwards;
+                # replaying one the build already saw is harmless.
+                applied = get_change_head(self.version_name)
+                self.build()
+                self._version, self._applied = version, applied
+
+    def _replay(self):
+        """
+        Apply logged changes after ``self._applied``; False when the log has
+        a gap or too much to replay.
+        """
+        head = get_change_head(self.version_name)
+        if head - self._applied > self.max_replay:
+            return False
+        position = self._applied
+        while True:
+            keys = [
+                _change_key(self.version_name, number)
+                for number in range(position + 1, max(head, position) + 33)
+            ]
+            entries = cache.get_many(keys)
+            for key in keys:
+                if key not in entries:
+                    # Nothing logged past ``position``, unless entries expired.
+                    return position >= head
+                method, args = entries[key]
+                getattr(self, method)(*args)
+                position += 1
+                self._applied = position
+
+    def invalidate(self):
+        bump_version(self.version_name)
+
+    def apply_change(self, method, *args):
+        """
+        Log a call of ``method(*args)`` for every process and apply it here
+        when this copy is otherwise up to date.
+        """
+        number = log_change(self.version_name, (method, args))
+        with self._lock:
+            if self._applied is not None and self._applied == number - 1:
+                getattr(self, method)(*args)
+                self._applied = number
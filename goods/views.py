@@ -1,18 +1,54 @@
+import re
+
 import django_filters
-from django.db.models import Q, Count
+from django.db.models import F, Q, Count
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework import viewsets
 from django_filters import rest_framework as filters
+from django_filters import utils as filter_utils
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from goods.attribute_filters import (
+    AttributeInFilter,
+    AttributeRangeFilter,
+    attribute_filter_registry,
+)
+from goods.attribute_index import attribute_index
+from goods.bulk import reprice_goods
+from goods.conditional import ConditionalGetMixin
+from goods.documents import document_queue, render_cards, render_json, with_origin
+from goods.facets import facet_index, RESIDUAL_FILTERS
+from goods.feeds import (
+    FEED_FORMATS,
+    FeedContentNegotiation,
+    FeedRateThrottle,
+    stream_feed,
+)
 from goods.models import Good, Category, Brand, Group, Attribute, AttributeValue, ProductImage
+from goods.navigation import get_navigation
+from goods.pagination import CustomPagination, CatalogCursorPagination
+from goods.response_cache import (
+    CachedResponseMixin,
+    CATALOG_TAG,
+    GOODS_DETAIL_TAG,
+    GOODS_LIST_TAG,
+    NAVIGATION_TAG,
+    category_tag,
+    good_tag,
+)
+from goods.search import search_goods
+from goods.suggest import suggest_index
 from goods.permissions import IsAdminOrReadOnly
 from goods.serializers import (
     CategorySerializer,
     GoodSerializer,
+    GoodListSerializer,
+    RepriceSerializer,
     BrandSerializer,
     AttributeSerializer,
     AttributeValueSerializer,
@@ -21,9 +57,12 @@ from goods.serializers import (
 )
 from reviews.serializers import ProductReviewSerializer
 
+ACCEPTS_GZIP_RE = re.compile(r"\bgzip\b")
 
-class AttributeViewSet(viewsets.ReadOnlyModelViewSet):
+
+class AttributeViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = AttributeSerializer
+    response_cache_tags = (CATALOG_TAG,)
 
     def get_queryset(self):
         category_ids = self.request.query_params.getlist("category")
@@ -35,7 +74,7 @@ class AttributeViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class AttributeValueViewSet(viewsets.ModelViewSet):
+class AttributeValueViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = AttributeValue.objects.all()
     serializer_class = AttributeValueSerializer
 
@@ -63,61 +102,128 @@ class GoodFilter(filters.FilterSet):
     def filter_by_brands(self, queryset, name, value):
         if value:
             brand_names = value.split(",")
-            return queryset.filter(brand__name__in=[brand.strip() for brand in brand_names]).distinct()
+            return queryset.filter(brand__name__in=[brand.strip() for brand in brand_names])
         return queryset
 
     def filter_by_search(self, queryset, name, value):
         if value:
-            return queryset.filter(
-                Q(name__icontains=value)
-                | Q(brand__name__icontains=value)
-                | Q(category__name__icontains=value)
-                | Q(attribute_values__value__icontains=value)
-            ).distinct()
+            queryset = search_goods(queryset, value)
+            if "search_rank" in queryset.query.annotations and not queryset.query.order_by:
+                queryset = queryset.order_by("-search_rank", "id")
         return queryset
 
     def filter_by_attribute(self, queryset, name, value, attribute_name=None):
+        if name in self.indexed_attribute_filters:
+            return queryset
+        # A semi-join on the (attribute, value) index instead of a join keeps
+        # one row per good, so no DISTINCT is needed.
         if value:
-            filter_kwargs = {
-                "attribute_values__attribute__name": attribute_name or name,
-                "attribute_values__value__in": value,
-            }
-            return queryset.filter(**filter_kwargs).distinct()
+            return queryset.filter(
+                pk__in=AttributeValue.objects.filter(
+                    attribute__name=attribute_name or name,
+                    value__in=[item.strip() for item in value],
+                ).values("good_id")
+            )
         return queryset
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        attributes = Attribute.objects.all()
+    def filter_by_attribute_range(
+        self, queryset, name, value, attribute_name=None, lookup_expr="gte"
+    ):
+        if value is not None:
+            return queryset.filter(
+                pk__in=AttributeValue.objects.filter(
+                    attribute__name=attribute_name or name,
+                    **{f"numeric_value__{lookup_expr}": value},
+                ).values("good_id")
+            )
+        return queryset
 
-        for attr in attributes:
-            filter_name = attr.name.lower().replace(" ", "_")
-            self.filters[filter_name] = filters.BaseInFilter(
-                method=lambda queryset, name, value, attr_name=attr.name: self.filter_by_attribute(
-                    queryset, name, value, attr_name
-                )
+    def filter_queryset(self, queryset):
+        # All attribute filters are resolved together from the in-memory
+        # index; the SQL filters above only run when it declines.
+        selected = {
+            name: value
+            for name, value in self.form.cleaned_data.items()
+            if value and isinstance(self.filters[name], AttributeInFilter)
+        }
+        if selected:
+            good_ids = attribute_index.matching_ids(
+                {
+                    self.filters[name].attribute_name: value
+                    for name, value in selected.items()
+                }
             )
+            if good_ids is not None:
+                queryset = queryset.filter(pk__in=good_ids)
+                self.indexed_attribute_filters = set(selected)
+        return super().filter_queryset(queryset)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.filters.update(attribute_filter_registry.clone_filters(self))
+        self.indexed_attribute_filters = set()
 
     class Meta:
         model = Good
         fields = ["category", "brand", "group", "min_price", "max_price"]
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 25
-    page_size_query_param = "limit"
-    max_page_size = 100
-
-
-class GoodViewSet(viewsets.ModelViewSet):
+class GoodViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = GoodSerializer
     lookup_field = "slug"
-    queryset = Good.objects.select_related("category", "brand").prefetch_related("attribute_values").all()
+    queryset = Good.objects.select_related("category", "brand").all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = GoodFilter
     pagination_class = CustomPagination
+    list_actions = ("list", "all")
+    response_cache_actions = ("list", "retrieve", "all")
+
+    @property
+    def paginator(self):
+        """
+        ``?pagination=cursor`` switches to keyset pagination for deep scrolling.
+        """
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("pagination") == "cursor":
+                self._paginator = CatalogCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_response_cache_tags(self, request):
+        if self.action == "retrieve":
+            return [
+                CATALOG_TAG,
+                GOODS_DETAIL_TAG,
+                good_tag(self.kwargs.get(self.lookup_field)),
+            ]
+        category = request.query_params.get("category")
+        if category:
+            # A category-scoped listing only changes with goods of that category.
+            category_ids = Category.objects.filter(name__iexact=category).values_list(
+                "id", flat=True
+            )
+            return [CATALOG_TAG, *map(category_tag, category_ids)]
+        return [CATALOG_TAG, GOODS_LIST_TAG]
+
+    def get_conditional_object_timestamp(self):
+        return (
+            Good.objects.filter(slug=self.kwargs.get(self.lookup_field))
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+
+    def get_serializer_class(self):
+        if self.action in self.list_actions:
+            return GoodListSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action not in self.list_actions:
+            queryset = queryset.select_related("category__group").prefetch_related(
+                "attribute_values__attribute__group", "images", "reviews__user"
+            )
         sale_filter = self.request.query_params.get("sale_percent")
         sorting = self.request.query_params.get("sort")
 
@@ -130,44 +236,202 @@ class GoodViewSet(viewsets.ModelViewSet):
                 "price_desc": "-final_price",
                 "popularity": "-reviews_count"
             }
-            queryset = queryset.annotate(reviews_count=Count("reviews")).order_by(sorting_options.get(sorting, "final_price"))
+            queryset = queryset.order_by(sorting_options.get(sorting, "final_price"))
 
-        attribute_ids = self.request.query_params.getlist("attributes")
+        attribute_ids = [
+            attribute_id
+            for attribute_id in self.request.query_params.getlist("attributes")
+            if attribute_id.isdigit()
+        ]
         if attribute_ids:
-            queryset = queryset.filter(attributes__id__in=attribute_ids).distinct()
-
-        return queryset.distinct()
+            queryset = queryset.filter(
+                pk__in=AttributeValue.objects.filter(
+                    attribute_id__in=attribute_ids
+                ).values("good_id")
+            )
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset()).filter(quantity__gt=0)
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        return queryset
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+    def uses_documents(self):
+        return self.request.accepted_renderer.format == "json"
 
-    @action(detail=False, methods=["get"], url_path="all")
-    def all(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    def retrieve(self, request, *args, **kwargs):
+        if self.uses_documents():
+            row = (
+                Good.objects.filter(slug=kwargs[self.lookup_field])
+                .values_list(
+                    "id", "updated_at", "document__detail", "document__good_updated_at"
+                )
+                .first()
+            )
+            if row is not None:
+                good_id, updated_at, detail, rendered_from = row
+                if detail is not None and rendered_from == updated_at:
+                    return HttpResponse(
+                        with_origin(detail.encode(), request),
+                        content_type="application/json",
+                    )
+                document_queue.add(good_ids=[good_id])
+        return super().retrieve(request, *args, **kwargs)
+
+    def list_response(self, queryset):
+        if self.uses_documents():
+            queryset = queryset.annotate(
+                document_card=F("document__card"),
+                document_rendered_from=F("document__good_updated_at"),
+            )
         page = self.paginate_queryset(queryset)
         if page is not None:
+            if self.uses_documents():
+                return self.get_document_page_response(page)
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def get_document_page_response(self, page):
+        """
+        Splice the stored cards of ``page`` into the paginator's envelope.
+        Goods without a current document are rendered here and queued.
+        """
+        stale = [
+            good
+            for good in page
+            if good.document_card is None
+            or good.document_rendered_from != good.updated_at
+        ]
+        rendered = {}
+        if stale:
+            document_queue.add(good_ids=[good.pk for good in stale])
+            rendered = dict(zip((good.pk for good in stale), render_cards(stale)))
+        cards = b",".join(
+            rendered.get(good.pk) or good.document_card.encode() for good in page
+        )
+        envelope = render_json(self.paginator.get_paginated_response([]).data)
+        content = envelope.replace(b'"results":[]', b'"results":[' + cards + b"]", 1)
+        return HttpResponse(
+            with_origin(content, self.request), content_type="application/json"
+        )
 
-class CategoryViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).filter(quantity__gt=0)
+        return self.list_response(queryset)
+
+    @action(detail=False, methods=["get"], url_path="all")
+    def all(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="feed",
+        content_negotiation_class=FeedContentNegotiation,
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[FeedRateThrottle],
+    )
+    def feed(self, request, *args, **kwargs):
+        """
+        Stream every good matching the catalog filters as ``?feed=jsonl``
+        (default), ``csv`` or ``xml``, gzipped when the client accepts it.
+
+        Partners sign in for it and are throttled; full exports without a
+        limit are the ``export_feed`` command.
+        """
+        feed_format = request.query_params.get("feed", "jsonl")
+        if feed_format not in FEED_FORMATS:
+            raise ValidationError(
+                {"feed": [f"Choose one of: {', '.join(FEED_FORMATS)}."]}
+            )
+        goods = self.filter_queryset(Good.objects.all())
+        compress = bool(
+            ACCEPTS_GZIP_RE.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        )
+        response = StreamingHttpResponse(
+            stream_feed(
+                feed_format, request.build_absolute_uri, goods, compress=compress
+            ),
+            content_type=FEED_FORMATS[feed_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="goods.{feed_format}"'
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request, *args, **kwargs):
+        restrict_ids = None
+        # Numeric ranges are not in the facet index either.
+        range_filters = [
+            name
+            for name, attribute_filter in attribute_filter_registry.get_filters().items()
+            if isinstance(attribute_filter, AttributeRangeFilter)
+        ]
+        residual = {
+            name: request.query_params[name]
+            for name in [*RESIDUAL_FILTERS, *range_filters]
+            if request.query_params.get(name)
+        }
+        if residual:
+            filterset = GoodFilter(residual, queryset=Good.objects.all(), request=request)
+            if not filterset.is_valid():
+                raise filter_utils.translate_validation(filterset.errors)
+            restrict_ids = filterset.qs.values_list("id", flat=True)
+        return Response(facet_index.facet_counts(request.query_params, restrict_ids))
+
+    @action(detail=False, methods=["get"], url_path="suggest")
+    def suggest(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "")
+        try:
+            limit = min(int(request.query_params.get("limit", 5)), 20)
+        except ValueError:
+            limit = 5
+        return Response(suggest_index.suggest(query, limit=max(limit, 1)))
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="reprice",
+        permission_classes=[IsAdminUser],
+    )
+    def reprice(self, request, *args, **kwargs):
+        serializer = RepriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = Good.objects.all()
+        if "category" in data:
+            queryset = queryset.filter(category__name__iexact=data["category"])
+        if "brand" in data:
+            brand_names = [brand.strip() for brand in data["brand"].split(",")]
+            queryset = queryset.filter(brand__name__in=brand_names)
+        if "group" in data:
+            queryset = queryset.filter(category__group__name__iexact=data["group"])
+        if "ids" in data:
+            queryset = queryset.filter(id__in=data["ids"])
+
+        updated = reprice_goods(
+            queryset,
+            sale_percent=data.get("sale_percent"),
+            price_percent=data.get("price_percent"),
+        )
+        return Response({"updated": updated})
+
+
+class CategoryViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.annotate(goods_count=Count("goods")).filter(goods_count__gt=0)
     serializer_class = CategorySerializer
+    response_cache_tags = (CATALOG_TAG, NAVIGATION_TAG)
+
+    def list(self, request, *args, **kwargs):
+        return Response(get_navigation()["categories"])
 
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
+    response_cache_tags = (CATALOG_TAG, GOODS_LIST_TAG)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -179,13 +443,17 @@ class BrandViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Group.objects.prefetch_related("categories").annotate(
         categories_with_goods=Count("categories__goods")
     ).filter(categories_with_goods__gt=0)
     serializer_class = GroupSerializer
+    response_cache_tags = (CATALOG_TAG, NAVIGATION_TAG)
+
+    def list(self, request, *args, **kwargs):
+        return Response(get_navigation()["groups"])
 
 
-class ProductImageViewSet(viewsets.ModelViewSet):
+class ProductImageViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ProductImage.objects.all()
     serializer_class = ProductImageSerializer
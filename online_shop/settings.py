@@ -105,6 +105,46 @@ DATABASES = {
     }
 }
 
+# Both caches must be shared by every process: index versions and their
+# change log, and the cached responses they invalidate, are how the
+# process_images worker and other web workers announce changes. The
+# database backend needs `python manage.py createcachetable`; Memcached or
+# Redis can be set through the environment. A local-memory cache only suits
+# a single process and triggers warning goods.W001.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "cache_default"),
+    },
+    "responses": {
+        "BACKEND": os.getenv(
+            "RESPONSE_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", "cache_responses"),
+        "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300")),
+    },
+}
+RESPONSE_CACHE_ALIAS = "responses"
+
+# Re-render pre-serialized good documents on a background thread; set to False
+# to render them inline after each commit.
+GOOD_DOCUMENTS_ASYNC = os.getenv("GOOD_DOCUMENTS_ASYNC", "True").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# Leave image variants to the process_images worker (the "worker" service of
+# docker-compose.yml); set to False to render them inside the request that
+# saved the image when no worker runs, or uploads stay pending.
+IMAGE_PROCESSING_ASYNC = os.getenv("IMAGE_PROCESSING_ASYNC", "True").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -151,6 +191,24 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Serve MEDIA_URL through goods.media.serve_media (ETags, byte ranges and
+# immutable caching of fingerprinted URLs). Behind nginx, set
+# MEDIA_ACCEL_REDIRECT to an internal location aliased to MEDIA_ROOT; behind
+# Apache or lighttpd set MEDIA_SENDFILE_HEADER to "X-Sendfile". Django then
+# only checks the request and the front server sends the file.
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", "True").lower() in ("true", "1", "yes")
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", "")
+MEDIA_SENDFILE_HEADER = os.getenv("MEDIA_SENDFILE_HEADER", "")
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+    # Good and product images: deduplicated, named by content hash.
+    "images": {"BACKEND": "goods.storage.ContentAddressedStorage"},
+}
+
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React (Frontend)
@@ -169,6 +227,19 @@ REST_FRAMEWORK = {
         "goods.permissions.IsAdminOrReadOnly",  # Налаштуйте за потребою
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "goods.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "goods.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Throttled views set their own classes; the feed reads the whole catalog.
+    "DEFAULT_THROTTLE_RATES": {
+        "feed": os.getenv("FEED_THROTTLE_RATE", "30/hour"),
+    },
 }
 
 SIMPLE_JWT = {
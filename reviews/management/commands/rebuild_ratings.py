@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, DecimalField, IntegerField, OuterRef, Subquery, Sum
+from django.db import transaction
+from django.db.models.functions import Coalesce, Now
+
+from goods.bulk import goods_changed_in_bulk
+from goods.models import Good
+from reviews.models import ProductReview
+
+
+class Command(BaseCommand):
+    help = "Recalculate rating_sum, reviews_count and avg_rating for every good."
+
+    def handle(self, *args, **options):
+        reviews = ProductReview.objects.filter(product=OuterRef("pk")).values("product")
+
+        def aggregate(expression, output_field):
+            return Coalesce(
+                Subquery(
+                    reviews.annotate(value=expression).values("value"),
+                    output_field=output_field,
+                ),
+                0,
+                output_field=output_field,
+            )
+
+        updated = Good.objects.update(
+            rating_sum=aggregate(Sum("rating"), IntegerField()),
+            reviews_count=aggregate(Count("id"), IntegerField()),
+            avg_rating=aggregate(
+                Avg("rating"), DecimalField(max_digits=3, decimal_places=2)
+            ),
+            updated_at=Now(),
+        )
+        transaction.on_commit(lambda: goods_changed_in_bulk(slugs=None))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings for {updated} goods."))
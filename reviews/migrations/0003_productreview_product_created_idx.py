@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0024_catalog_indexes"),
+        ("reviews", "0002_alter_productreview_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productreview",
+            index=models.Index(
+                fields=["product", "-created_at"], name="review_product_created_idx"
+            ),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 
 from goods.models import Good
 from users.models import CustomUser
@@ -18,3 +18,16 @@ class ProductReview(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(5)]
     )
     product = models.ForeignKey(Good, related_name="reviews", on_delete=models.CASCADE)
+
+    def save(self, *args, **kwargs):
+        # The rating signals lock the stored row in pre_save; the lock has to
+        # be held until the good's rating columns are updated in post_save.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["product", "-created_at"], name="review_product_created_idx"
+            ),
+        ]
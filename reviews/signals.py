@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import F, FloatField, DecimalField
+from django.db.models.functions import Cast, Coalesce, NullIf, Now
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from goods.conditional import GOODS_VERSION
+from goods.documents import document_queue
+from goods.models import Good
+from goods.response_cache import invalidate_good
+from goods.versions import bump_version
+from reviews.models import ProductReview
+
+
+def apply_rating_delta(product_id, rating_delta, count_delta):
+    """
+    Shift the denormalized rating columns of a good in a single UPDATE.
+
+    The average is derived from the pre-update column values plus the delta,
+    so concurrent reviews never overwrite each other's contribution.
+    """
+    new_sum = F("rating_sum") + rating_delta
+    new_count = F("reviews_count") + count_delta
+    Good.objects.filter(pk=product_id).update(
+        rating_sum=new_sum,
+        reviews_count=new_count,
+        avg_rating=Coalesce(
+            Cast(new_sum, FloatField()) / NullIf(new_count, 0),
+            0,
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+        updated_at=Now(),
+    )
+    product_changed(product_id)
+
+
+def touch_product(product_id):
+    """
+    Mark a good as changed when only the text of one of its reviews changed.
+    """
+    Good.objects.filter(pk=product_id).update(updated_at=Now())
+    product_changed(product_id)
+
+
+def product_changed(product_id):
+    transaction.on_commit(lambda: bump_version(GOODS_VERSION))
+    transaction.on_commit(lambda: invalidate_good(good_id=product_id))
+    transaction.on_commit(lambda: document_queue.add(good_ids=[product_id]))
+
+
+def stored_rating(review_id):
+    """
+    ``(product_id, rating)`` of the stored review, locked until the end of
+    the transaction so concurrent edits apply their deltas one after another.
+    """
+    return (
+        ProductReview.objects.select_for_update()
+        .filter(pk=review_id)
+        .values_list("product_id", "rating")
+        .first()
+    )
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = stored_rating(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    if created or previous is None:
+        apply_rating_delta(instance.product_id, instance.rating, 1)
+        return
+
+    previous_product_id, previous_rating = previous
+    if previous_product_id != instance.product_id:
+        apply_rating_delta(previous_product_id, -previous_rating, -1)
+        apply_rating_delta(instance.product_id, instance.rating, 1)
+    elif previous_rating != instance.rating:
+        apply_rating_delta(instance.product_id, instance.rating - previous_rating, 0)
+    else:
+        # Reviews are rendered into the good's detail payload.
+        touch_product(instance.product_id)
+
+
+@receiver(pre_delete, sender=ProductReview)
+def remember_deleted_rating(sender, instance, **kwargs):
+    # The instance may hold a rating another request has changed since.
+    instance._previous_rating = stored_rating(instance.pk)
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_on_delete(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    if previous is None:
+        # A concurrent delete removed the row and already applied the delta.
+        return
+    product_id, rating = previous
+    apply_rating_delta(product_id, -rating, -1)
@@ -1,3 +1,79 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from goods.models import Good
+from goods.tests import CatalogTestCase
+from reviews.models import ProductReview
+
+
+class ReviewRatingTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            "+380501234567", password="secret"
+        )
+        self.galaxy = self.make_good("Galaxy")
+        self.pixel = self.make_good("Pixel")
+
+    def review(self, rating, product=None):
+        return ProductReview.objects.create(
+            user=self.user, product=product or self.galaxy, rating=rating, text="ok"
+        )
+
+    def assertRating(self, good, rating_sum, reviews_count, avg_rating):
+        good = Good.objects.get(pk=good.pk)
+        self.assertEqual(
+            (good.rating_sum, good.reviews_count, good.avg_rating),
+            (rating_sum, reviews_count, Decimal(avg_rating)),
+        )
+
+    def test_columns_follow_creates_edits_moves_and_deletes(self):
+        first = self.review(5)
+        self.review(2)
+        self.assertRating(self.galaxy, 7, 2, "3.50")
+
+        first.rating = 4
+        first.save()
+        self.assertRating(self.galaxy, 6, 2, "3.00")
+
+        first.product = self.pixel
+        first.save()
+        self.assertRating(self.galaxy, 2, 1, "2.00")
+        self.assertRating(self.pixel, 4, 1, "4.00")
+
+        first.delete()
+        self.assertRating(self.pixel, 0, 0, "0")
+
+    def test_stale_instances_apply_the_stored_rating(self):
+        review = self.review(5)
+        stale_edit = ProductReview.objects.get(pk=review.pk)
+        stale_delete = ProductReview.objects.get(pk=review.pk)
+        review.rating = 1
+        review.save()
+
+        stale_edit.rating = 3
+        stale_edit.save()
+        self.assertRating(self.galaxy, 3, 1, "3.00")
+
+        # Still rated 5 in memory; the stored 3 is what gets subtracted.
+        stale_delete.delete()
+        self.assertRating(self.galaxy, 0, 0, "0")
+
+    def test_deleting_a_deleted_review_changes_nothing(self):
+        review = self.review(4)
+        stale = ProductReview.objects.get(pk=review.pk)
+        review.delete()
+        stale.delete()
+        self.assertRating(self.galaxy, 0, 0, "0")
+
+    @skipUnless(connection.features.has_select_for_update, "no row locks")
+    def test_previous_rating_is_read_under_a_lock(self):
+        review = self.review(5)
+        review.rating = 4
+        with CaptureQueriesContext(connection) as queries:
+            review.save()
+        self.assertTrue(any("FOR UPDATE" in query["sql"] for query in queries))